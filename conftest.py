@@ -0,0 +1,10 @@
+import pytest
+
+pytest_plugins = ('core.pytest_plugin',)
+
+
+@pytest.fixture(autouse=True)
+def test_settings(settings):
+    """Кеш в памяти процесса и миниатюры сразу, без пула потоков."""
+    settings.CACHES = settings.TEST_CACHES
+    settings.THUMBNAIL_WORKERS = 0
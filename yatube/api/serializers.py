@@ -0,0 +1,44 @@
+from django.core.files.storage import default_storage
+
+# Поля проекций values(): связанные объекты приходят одним JOIN,
+# экземпляры моделей не создаются
+POST_FIELDS = (
+    'id', 'text', 'pub_date', 'updated', 'image',
+    'author__username', 'group__slug',
+)
+POST_DETAIL_FIELDS = POST_FIELDS + ('group__title', 'comments_count')
+COMMENT_FIELDS = ('id', 'text', 'created', 'author__username')
+
+
+def image_url(request, name):
+    if not name:
+        return None
+    return request.build_absolute_uri(default_storage.url(name))
+
+
+def serialize_post(request, row):
+    return {
+        'id': row['id'],
+        'text': row['text'],
+        'author': row['author__username'],
+        'group': row['group__slug'],
+        'image': image_url(request, row['image']),
+        'pub_date': row['pub_date'],
+        'updated': row['updated'],
+    }
+
+
+def serialize_post_detail(request, row):
+    data = serialize_post(request, row)
+    data['group_title'] = row['group__title']
+    data['comments_count'] = row['comments_count']
+    return data
+
+
+def serialize_comment(request, row):
+    return {
+        'id': row['id'],
+        'text': row['text'],
+        'author': row['author__username'],
+        'created': row['created'],
+    }
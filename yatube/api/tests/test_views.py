@@ -0,0 +1,114 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from api import views
+from posts.models import Comment, Group, Post, User
+
+
+class ApiViewsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Loly')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug', description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.user, group=cls.group, text=f'Пост {number}'
+            )
+            for number in range(views.NUMBER_OF_RECORDS + 3)
+        ]
+        cls.post = cls.posts[-1]
+        for number in range(3):
+            Comment.objects.create(
+                post=cls.post, author=cls.user, text=f'Комментарий {number}'
+            )
+
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+
+    def test_feeds_are_paged_by_cursor(self):
+        urls = (
+            reverse('api:index'),
+            reverse('api:group_posts', kwargs={'slug': 'test-slug'}),
+            reverse('api:profile', kwargs={'username': 'Loly'}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                first = self.client.get(url).json()
+                self.assertEqual(
+                    len(first['results']), views.NUMBER_OF_RECORDS
+                )
+                self.assertIsNone(first['previous'])
+                self.assertEqual(first['results'][0], {
+                    'id': self.post.pk,
+                    'text': self.post.text,
+                    'author': 'Loly',
+                    'group': 'test-slug',
+                    'image': None,
+                    'pub_date': first['results'][0]['pub_date'],
+                    'updated': first['results'][0]['updated'],
+                })
+                second = self.client.get(first['next']).json()
+                self.assertEqual(len(second['results']), 3)
+                self.assertIsNone(second['next'])
+                self.assertIsNotNone(second['previous'])
+
+    def test_post_detail_and_comments(self):
+        detail = self.client.get(
+            reverse('api:post_detail', kwargs={'post_id': self.post.pk})
+        ).json()
+        self.assertEqual(detail['comments_count'], 3)
+        self.assertEqual(detail['group_title'], 'Тестовая группа')
+        comments = self.client.get(
+            reverse('api:post_comments', kwargs={'post_id': self.post.pk})
+        ).json()
+        self.assertEqual(
+            [comment['text'] for comment in comments['results']],
+            ['Комментарий 0', 'Комментарий 1', 'Комментарий 2'],
+        )
+
+    def test_missing_objects_and_bad_cursor(self):
+        responses = (
+            self.client.get(reverse('api:post_detail', kwargs={'post_id': 0})),
+            self.client.get(
+                reverse('api:group_posts', kwargs={'slug': 'missing'})
+            ),
+            self.client.get(
+                reverse('api:profile', kwargs={'username': 'missing'})
+            ),
+        )
+        for response in responses:
+            with self.subTest(url=response.request['PATH_INFO']):
+                self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse('api:index'), {'cursor': 'xxx'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_read_only(self):
+        response = self.client.post(reverse('api:index'))
+        self.assertEqual(response.status_code, 405)
+
+    def test_conditional_get(self):
+        url = reverse('api:index')
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Post.objects.create(author=self.user, text='Новый пост')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_new_comment_changes_post_etag(self):
+        url = reverse('api:post_comments', kwargs={'post_id': self.post.pk})
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Comment.objects.create(
+            post=self.post, author=self.user, text='Новый комментарий'
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
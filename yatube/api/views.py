@@ -0,0 +1,113 @@
+from django.http import JsonResponse
+from django.views.decorators.http import condition, require_safe
+
+from posts import caching
+from posts.models import Comment, Group, Post, User
+from posts.paginators import (
+    CommentPaginator, CursorPaginator, decode_cursor,
+)
+
+from .serializers import (
+    COMMENT_FIELDS, POST_DETAIL_FIELDS, POST_FIELDS, serialize_comment,
+    serialize_post, serialize_post_detail,
+)
+
+NUMBER_OF_RECORDS = 20
+NUMBER_OF_COMMENTS = 50
+
+
+def json_response(data, status=200):
+    return JsonResponse(
+        data,
+        status=status,
+        json_dumps_params={'ensure_ascii': False, 'separators': (',', ':')},
+    )
+
+
+def not_found():
+    return json_response({'detail': 'Не найдено.'}, status=404)
+
+
+def page_link(request, cursor):
+    if cursor is None:
+        return None
+    params = request.GET.copy()
+    params['cursor'] = cursor
+    return request.build_absolute_uri(f'{request.path}?{params.urlencode()}')
+
+
+def paginated(request, paginator, serializer):
+    """Курсорная страница строк values() без COUNT(*) и OFFSET."""
+    token = request.GET.get('cursor')
+    if token:
+        cursor = decode_cursor(token)
+        if cursor is None:
+            return json_response({'detail': 'Неверный курсор.'}, status=400)
+        page = paginator.cursor_page(*cursor)
+    else:
+        page = paginator.cursor_page()
+    return json_response({
+        'results': [serializer(request, row) for row in page],
+        'next': page_link(request, page.next_cursor),
+        'previous': page_link(request, page.previous_cursor),
+    })
+
+
+def posts_page(request, posts):
+    return paginated(
+        request,
+        CursorPaginator(posts.values(*POST_FIELDS), NUMBER_OF_RECORDS),
+        serialize_post,
+    )
+
+
+@require_safe
+@condition(etag_func=caching.etag_func('global'))
+def index(request):
+    return posts_page(request, Post.objects.all())
+
+
+@require_safe
+@condition(etag_func=caching.etag_func('group:{slug}'))
+def group_posts(request, slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'pk', flat=True
+    ).first()
+    if group_id is None:
+        return not_found()
+    return posts_page(request, Post.objects.filter(group_id=group_id))
+
+
+@require_safe
+@condition(etag_func=caching.etag_func('author:{username}'))
+def profile(request, username):
+    author_id = User.objects.filter(username=username).values_list(
+        'pk', flat=True
+    ).first()
+    if author_id is None:
+        return not_found()
+    return posts_page(request, Post.objects.filter(author_id=author_id))
+
+
+@require_safe
+@condition(etag_func=caching.etag_func('post:{post_id}'))
+def post_detail(request, post_id):
+    row = Post.objects.filter(pk=post_id).values(*POST_DETAIL_FIELDS).first()
+    if row is None:
+        return not_found()
+    return json_response(serialize_post_detail(request, row))
+
+
+@require_safe
+@condition(etag_func=caching.etag_func('post:{post_id}'))
+def post_comments(request, post_id):
+    if not Post.objects.filter(pk=post_id).exists():
+        return not_found()
+    comments = Comment.objects.filter(post_id=post_id).values(
+        *COMMENT_FIELDS
+    )
+    return paginated(
+        request,
+        CommentPaginator(comments, NUMBER_OF_COMMENTS),
+        serialize_comment,
+    )
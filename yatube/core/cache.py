@@ -0,0 +1,274 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS cache ('
+    'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL, '
+    'accessed REAL NOT NULL, size INTEGER NOT NULL) WITHOUT ROWID',
+    'CREATE INDEX IF NOT EXISTS cache_accessed_idx ON cache (accessed)',
+    'CREATE INDEX IF NOT EXISTS cache_expires_idx ON cache (expires)',
+    # Число и общий размер записей ведут триггеры, чтобы проверка
+    # переполнения после записи не сканировала всю таблицу
+    'CREATE TABLE IF NOT EXISTS cache_totals ('
+    'id INTEGER PRIMARY KEY CHECK (id = 1), '
+    'count INTEGER NOT NULL, size INTEGER NOT NULL)',
+    'INSERT OR IGNORE INTO cache_totals '
+    'SELECT 1, count(*), coalesce(sum(size), 0) FROM cache',
+    'CREATE TRIGGER IF NOT EXISTS cache_totals_insert '
+    'AFTER INSERT ON cache BEGIN UPDATE cache_totals '
+    'SET count = count + 1, size = size + new.size; END',
+    'CREATE TRIGGER IF NOT EXISTS cache_totals_delete '
+    'AFTER DELETE ON cache BEGIN UPDATE cache_totals '
+    'SET count = count - 1, size = size - old.size; END',
+    'CREATE TRIGGER IF NOT EXISTS cache_totals_update '
+    'AFTER UPDATE OF size ON cache BEGIN UPDATE cache_totals '
+    'SET size = size - old.size + new.size; END',
+)
+
+# Время последнего чтения обновляется не чаще раза в столько секунд,
+# чтобы горячие ключи не превращали каждое чтение в запись
+ACCESS_RESOLUTION = 1.0
+# Времена чтения копятся в памяти процесса и записываются одной
+# транзакцией, когда их набирается столько или проходит столько секунд
+ACCESS_BATCH_SIZE = 100
+ACCESS_FLUSH_INTERVAL = 5.0
+
+
+class SQLiteCache(BaseCache):
+    """Кеш в файле SQLite, общий для всех процессов одного хоста.
+
+    LOCATION — путь к файлу базы. Размер ограничен OPTIONS
+    MAX_ENTRIES и, если задан, MAX_BYTES: при переполнении удаляются
+    истёкшие, а затем давно не читавшиеся ключи (LRU) с запасом в
+    1/CULL_FREQUENCY лимита, как в кеше Django в базе, чтобы следующие
+    записи не чистили таблицу снова. incr/decr и add атомарны между
+    процессами за счёт BEGIN IMMEDIATE.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = location
+        options = params.get('OPTIONS', {})
+        self._max_bytes = int(options.get('MAX_BYTES', 0))
+        self._local = threading.local()
+        self._accessed = {}
+        self._accessed_lock = threading.Lock()
+        self._flushed = time.monotonic()
+
+    def _connection(self):
+        db = getattr(self._local, 'db', None)
+        if db is None or self._local.pid != os.getpid():
+            db = sqlite3.connect(self._path, timeout=10, isolation_level=None)
+            db.execute('PRAGMA journal_mode = wal')
+            db.execute('PRAGMA synchronous = normal')
+            for statement in SCHEMA:
+                db.execute(statement)
+            self._local.db = db
+            self._local.pid = os.getpid()
+        return db
+
+    @contextmanager
+    def _write(self):
+        db = self._connection()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            yield db
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+
+    def _fetch(self, db, keys, now):
+        rows = {}
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ', '.join('?' * len(chunk))
+            rows.update(
+                (key, (value, accessed))
+                for key, value, accessed in db.execute(
+                    'SELECT key, value, accessed FROM cache '
+                    f'WHERE key IN ({placeholders}) '
+                    'AND (expires IS NULL OR expires > ?)',
+                    (*chunk, now),
+                )
+            )
+        return rows
+
+    def _touch_accessed(self, rows, now):
+        """Запоминает время чтения, чтобы записать его пачкой."""
+        with self._accessed_lock:
+            for key, (value, accessed) in rows.items():
+                if now - accessed > ACCESS_RESOLUTION:
+                    self._accessed[key] = now
+            due = self._accessed and (
+                len(self._accessed) >= ACCESS_BATCH_SIZE
+                or time.monotonic() - self._flushed > ACCESS_FLUSH_INTERVAL
+            )
+        if due:
+            with self._write() as db:
+                self._flush_accessed(db)
+
+    def _flush_accessed(self, db):
+        with self._accessed_lock:
+            pending, self._accessed = self._accessed, {}
+            self._flushed = time.monotonic()
+        if pending:
+            db.executemany(
+                'UPDATE cache SET accessed = ? WHERE key = ?',
+                ((accessed, key) for key, accessed in pending.items()),
+            )
+
+    def _store(self, db, key, value, timeout, now):
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        db.execute(
+            'INSERT INTO cache (key, value, expires, accessed, size) '
+            'VALUES (?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET '
+            'value = excluded.value, expires = excluded.expires, '
+            'accessed = excluded.accessed, size = excluded.size',
+            (key, data, self.get_backend_timeout(timeout), now, len(data)),
+        )
+
+    def _totals(self, db):
+        return db.execute(
+            'SELECT count, size FROM cache_totals WHERE id = 1'
+        ).fetchone()
+
+    def _over_limit(self, count, size):
+        return count > self._max_entries or (
+            self._max_bytes and size > self._max_bytes
+        )
+
+    def _cull(self, db, now):
+        if not self._over_limit(*self._totals(db)):
+            return
+        db.execute('DELETE FROM cache WHERE expires <= ?', (now,))
+        count, size = self._totals(db)
+        if not self._over_limit(count, size):
+            return
+        self._flush_accessed(db)
+        if self._cull_frequency:
+            max_entries = self._max_entries - (
+                self._max_entries // self._cull_frequency
+            )
+            max_bytes = self._max_bytes - (
+                self._max_bytes // self._cull_frequency
+            )
+        else:
+            max_entries = max_bytes = 0
+        if count > self._max_entries:
+            db.execute(
+                'DELETE FROM cache WHERE key IN ('
+                'SELECT key FROM cache ORDER BY accessed LIMIT ?)',
+                (count - max_entries,),
+            )
+            count, size = self._totals(db)
+        if self._max_bytes and size > self._max_bytes:
+            db.execute(
+                'DELETE FROM cache WHERE key IN ('
+                'SELECT key FROM (SELECT key, size, sum(size) OVER '
+                '(ORDER BY accessed, key) AS total FROM cache) '
+                'WHERE total - size < ?)',
+                (size - max_bytes,),
+            )
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        now = time.time()
+        with self._write() as db:
+            if self._fetch(db, [key], now):
+                return False
+            self._store(db, key, value, timeout, now)
+            self._cull(db, now)
+        return True
+
+    def get(self, key, default=None, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return self._get_many([key]).get(key, default)
+
+    def _get_many(self, keys):
+        now = time.time()
+        db = self._connection()
+        rows = self._fetch(db, keys, now)
+        self._touch_accessed(rows, now)
+        return {
+            key: pickle.loads(value) for key, (value, accessed) in rows.items()
+        }
+
+    def get_many(self, keys, version=None):
+        made = {self.make_key(key, version=version): key for key in keys}
+        for key in made:
+            self.validate_key(key)
+        values = self._get_many(list(made))
+        return {made[key]: value for key, value in values.items()}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        now = time.time()
+        with self._write() as db:
+            for key, value in data.items():
+                key = self.make_key(key, version=version)
+                self.validate_key(key)
+                self._store(db, key, value, timeout, now)
+            self._cull(db, now)
+        return []
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        now = time.time()
+        cursor = self._connection().execute(
+            'UPDATE cache SET expires = ?, accessed = ? WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), now, key, now),
+        )
+        return bool(cursor.rowcount)
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        now = time.time()
+        with self._write() as db:
+            row = db.execute(
+                'SELECT value FROM cache WHERE key = ? '
+                'AND (expires IS NULL OR expires > ?)',
+                (key, now),
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(row[0]) + delta
+            data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            db.execute(
+                'UPDATE cache SET value = ?, accessed = ?, size = ? '
+                'WHERE key = ?',
+                (data, now, len(data), key),
+            )
+        return value
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version)
+
+    def delete_many(self, keys, version=None):
+        keys = [self.make_key(key, version=version) for key in keys]
+        for key in keys:
+            self.validate_key(key)
+        self._connection().executemany(
+            'DELETE FROM cache WHERE key = ?', ((key,) for key in keys)
+        )
+
+    def has_key(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return bool(self._fetch(self._connection(), [key], time.time()))
+
+    def clear(self):
+        self._connection().execute('DELETE FROM cache')
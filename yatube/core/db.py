@@ -0,0 +1,50 @@
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections, transaction
+
+_write_lock = threading.RLock()
+
+
+def apply_pragmas(cursor, pragmas):
+    """Выполняет PRAGMA {имя: значение} на курсоре или соединении."""
+    for name, value in pragmas.items():
+        cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def configure_connection(sender, connection, **kwargs):
+    """Настраивает новое соединение с SQLite по профилю SQLITE_PROFILE."""
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = settings.SQLITE_PROFILES[settings.SQLITE_PROFILE]
+    with connection.cursor() as cursor:
+        apply_pragmas(cursor, pragmas)
+
+
+@contextmanager
+def serialized_write(using='default', immediate=False):
+    """Транзакция записи, которую потоки процесса выполняют по одной.
+
+    SQLite допускает одного писателя, поэтому запись ждёт очереди на
+    блокировке процесса, а не на busy_timeout базы; читатели в режиме
+    WAL при этом не блокируются. immediate=True начинает транзакцию с
+    BEGIN IMMEDIATE при любом профиле: блокировка записи берётся до
+    первого чтения, и другие процессы не пишут между чтением и записью.
+    Для других СУБД это просто atomic().
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        with transaction.atomic(using=using):
+            yield
+        return
+    with _write_lock:
+        previous = getattr(connection, 'transaction_mode', None)
+        if immediate and not connection.in_atomic_block:
+            connection.transaction_mode = 'IMMEDIATE'
+        try:
+            with transaction.atomic(using=using):
+                connection.transaction_mode = previous
+                yield
+        finally:
+            connection.transaction_mode = previous
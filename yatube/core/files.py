@@ -0,0 +1,247 @@
+import mimetypes
+import os
+import re
+from http import HTTPStatus
+from wsgiref.util import FileWrapper
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.handlers.wsgi import get_path_info
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_http_date_safe
+
+# Кодировки заранее сжатых копий в порядке предпочтения
+ENCODINGS = (('br', 'br'), ('gzip', 'gz'))
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+BLOCK_SIZE = 64 * 1024
+
+
+def status_line(status):
+    return f'{status.value} {status.phrase}'
+
+
+def accepted_encodings(environ):
+    """Кодировки из Accept-Encoding, кроме явно запрещённых q=0."""
+    accepted = set()
+    for item in environ.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        name, *params = (part.strip() for part in item.split(';'))
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name and quality > 0:
+            accepted.add(name.lower())
+    return accepted
+
+
+def parse_range(header, size):
+    """Один диапазон байт (start, end) из Range.
+
+    Для заголовка, который нельзя разобрать, или нескольких диапазонов
+    возвращает None — отдаётся весь файл; для невыполнимого диапазона —
+    False.
+    """
+    match = RANGE_RE.match(header.replace(' ', ''))
+    if match is None:
+        return None
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if not start:
+        length = int(end)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+class RangeFile:
+    """Файл, из которого читается не больше length байт.
+
+    У него нет fileno(), поэтому wsgi.file_wrapper сервера не отдаст
+    через sendfile весь файл вместо диапазона.
+    """
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=BLOCK_SIZE):
+        data = self.file.read(min(size, self.remaining))
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+class StaticFile:
+    """Файл на диске и его заранее сжатые копии."""
+
+    def __init__(self, path, max_age):
+        self.path = path
+        self.max_age = max_age
+        self.encodings = {
+            encoding: f'{path}.{suffix}'
+            for encoding, suffix in ENCODINGS
+            if os.path.isfile(f'{path}.{suffix}')
+        }
+
+    def select(self, environ):
+        """Путь и кодировка копии для клиента.
+
+        Диапазоны отдаются только из несжатого файла.
+        """
+        if 'HTTP_RANGE' not in environ:
+            accepted = accepted_encodings(environ)
+            for encoding, _ in ENCODINGS:
+                if encoding in self.encodings and encoding in accepted:
+                    return self.encodings[encoding], encoding
+        return self.path, None
+
+
+class FileServer:
+    """WSGI-обёртка, которая сама отдаёт статику и медиа.
+
+    Статика из STATIC_ROOT читается один раз при старте: имена с хешем
+    содержимого из манифеста кешируются клиентами навсегда, остальные
+    — на STATIC_MAX_AGE, сжатые копии отдаются по Accept-Encoding.
+    Медиа ищутся на диске при каждом запросе. Поддерживаются HEAD,
+    ETag, If-Modified-Since и Range; прочие запросы уходят в Django.
+    """
+
+    def __init__(self, application):
+        self.application = application
+        self.static_url = settings.STATIC_URL
+        self.media_url = settings.MEDIA_URL
+        self.static_files = self.scan_static()
+
+    def scan_static(self):
+        root = settings.STATIC_ROOT
+        if not root or not os.path.isdir(root):
+            return {}
+        manifest = getattr(staticfiles_storage, 'hashed_files', {})
+        hashed = set(manifest.values())
+        files = {}
+        for directory, _, names in os.walk(root):
+            for name in names:
+                if name.endswith(('.gz', '.br')):
+                    continue
+                path = os.path.join(directory, name)
+                relative = os.path.relpath(path, root).replace(os.sep, '/')
+                files[relative] = StaticFile(
+                    path,
+                    settings.IMMUTABLE_MAX_AGE if relative in hashed
+                    else settings.STATIC_MAX_AGE,
+                )
+        return files
+
+    def __call__(self, environ, start_response):
+        path = get_path_info(environ)
+        static_file = None
+        if path.startswith(self.static_url):
+            static_file = self.static_files.get(path[len(self.static_url):])
+        elif path.startswith(self.media_url):
+            static_file = self.find_media(path[len(self.media_url):])
+        if static_file is None:
+            return self.application(environ, start_response)
+        if environ['REQUEST_METHOD'] not in ('GET', 'HEAD'):
+            start_response(
+                status_line(HTTPStatus.METHOD_NOT_ALLOWED),
+                [('Allow', 'GET, HEAD'), ('Content-Length', '0')],
+            )
+            return []
+        return self.serve(environ, start_response, static_file)
+
+    def find_media(self, name):
+        try:
+            path = safe_join(settings.MEDIA_ROOT, name)
+        except (SuspiciousFileOperation, ValueError):
+            return None
+        if not os.path.isfile(path):
+            return None
+        return StaticFile(path, settings.MEDIA_MAX_AGE)
+
+    def serve(self, environ, start_response, static_file):
+        path, encoding = static_file.select(environ)
+        stat = os.stat(path)
+        size, mtime = stat.st_size, int(stat.st_mtime)
+        etag = f'"{mtime:x}-{size:x}{"-" + encoding if encoding else ""}"'
+        content_type, _ = mimetypes.guess_type(static_file.path)
+        headers = [
+            ('Last-Modified', http_date(mtime)),
+            ('ETag', etag),
+            ('Cache-Control', self.cache_control(static_file.max_age)),
+            ('Accept-Ranges', 'bytes'),
+        ]
+        if static_file.encodings:
+            headers.append(('Vary', 'Accept-Encoding'))
+        if self.not_modified(environ, etag, mtime):
+            start_response(status_line(HTTPStatus.NOT_MODIFIED), headers)
+            return []
+        headers.append(
+            ('Content-Type', content_type or 'application/octet-stream')
+        )
+        if encoding:
+            headers.append(('Content-Encoding', encoding))
+        byte_range = None
+        if self.range_applies(environ, etag, mtime):
+            byte_range = parse_range(environ['HTTP_RANGE'], size)
+        if byte_range is False:
+            headers.append(('Content-Range', f'bytes */{size}'))
+            headers.append(('Content-Length', '0'))
+            start_response(
+                status_line(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE),
+                headers,
+            )
+            return []
+        status, start, length = HTTPStatus.OK, 0, size
+        if byte_range is not None:
+            start, end = byte_range
+            status, length = HTTPStatus.PARTIAL_CONTENT, end - start + 1
+            headers.append(('Content-Range', f'bytes {start}-{end}/{size}'))
+        headers.append(('Content-Length', str(length)))
+        start_response(status_line(status), headers)
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            return []
+        file = open(path, 'rb')
+        if status == HTTPStatus.PARTIAL_CONTENT:
+            file.seek(start)
+            file = RangeFile(file, length)
+        file_wrapper = environ.get('wsgi.file_wrapper', FileWrapper)
+        return file_wrapper(file, BLOCK_SIZE)
+
+    def cache_control(self, max_age):
+        if max_age >= settings.IMMUTABLE_MAX_AGE:
+            return f'public, max-age={max_age}, immutable'
+        return f'public, max-age={max_age}'
+
+    def not_modified(self, environ, etag, mtime):
+        if_none_match = environ.get('HTTP_IF_NONE_MATCH')
+        if if_none_match is not None:
+            tags = [tag.strip() for tag in if_none_match.split(',')]
+            return '*' in tags or etag in tags or f'W/{etag}' in tags
+        since = parse_http_date_safe(
+            environ.get('HTTP_IF_MODIFIED_SINCE', '')
+        )
+        return since is not None and mtime <= since
+
+    def range_applies(self, environ, etag, mtime):
+        """Range выполняется, если If-Range нет или он совпадает."""
+        if 'HTTP_RANGE' not in environ:
+            return False
+        if_range = environ.get('HTTP_IF_RANGE')
+        if if_range is None:
+            return True
+        if if_range.startswith(('"', 'W/')):
+            return if_range == etag
+        return parse_http_date_safe(if_range) == mtime
@@ -0,0 +1,111 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.db import apply_pragmas
+
+
+class Worker(threading.Thread):
+    """Поток, который пишет или читает временную базу до дедлайна."""
+
+    def __init__(self, path, pragmas, deadline, writer, lock=None):
+        super().__init__(daemon=True)
+        self.path = path
+        self.pragmas = pragmas
+        self.deadline = deadline
+        self.writer = writer
+        self.lock = lock
+        self.done = 0
+        self.errors = 0
+
+    def run(self):
+        db = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        apply_pragmas(db, self.pragmas)
+        while time.monotonic() < self.deadline:
+            try:
+                if self.writer:
+                    self.write(db)
+                else:
+                    db.execute('SELECT count(*) FROM item').fetchone()
+                self.done += 1
+            except sqlite3.OperationalError:
+                self.errors += 1
+                if db.in_transaction:
+                    db.execute('ROLLBACK')
+        db.close()
+
+    def write(self, db):
+        # Чтение перед записью, как у save() после проверки формы:
+        # в отложенной транзакции именно здесь возникает блокировка
+        if self.lock is None:
+            db.execute('BEGIN')
+            self.insert(db)
+            return
+        with self.lock:
+            db.execute('BEGIN IMMEDIATE')
+            self.insert(db)
+
+    def insert(self, db):
+        db.execute('SELECT max(id) FROM item').fetchone()
+        db.execute('INSERT INTO item (payload) VALUES (?)', ('x' * 200,))
+        db.execute('COMMIT')
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает конкурентную запись и чтение SQLite с настройками '
+        'по умолчанию и с профилем production.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--seconds', type=float, default=3.0)
+
+    def run_profile(self, profile, serialized, options):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'bench.sqlite3')
+            pragmas = settings.SQLITE_PROFILES[profile]
+            db = sqlite3.connect(path, isolation_level=None)
+            apply_pragmas(db, pragmas)
+            db.execute(
+                'CREATE TABLE item (id INTEGER PRIMARY KEY, payload TEXT)'
+            )
+            db.close()
+            lock = threading.Lock() if serialized else None
+            deadline = time.monotonic() + options['seconds']
+            workers = [
+                Worker(path, pragmas, deadline, True, lock)
+                for _ in range(options['writers'])
+            ] + [
+                Worker(path, pragmas, deadline, False)
+                for _ in range(options['readers'])
+            ]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+        return {
+            writer: (
+                sum(w.done for w in workers if w.writer == writer),
+                sum(w.errors for w in workers if w.writer == writer),
+            )
+            for writer in (True, False)
+        }
+
+    def handle(self, *args, **options):
+        seconds = options['seconds']
+        for profile, serialized in (('default', False), ('production', True)):
+            result = self.run_profile(profile, serialized, options)
+            writes, write_errors = result[True]
+            reads, read_errors = result[False]
+            self.stdout.write(
+                f'{profile:>10}: записей {writes / seconds:8.0f}/с '
+                f'(ошибок {write_errors}), '
+                f'чтений {reads / seconds:8.0f}/с (ошибок {read_errors})'
+            )
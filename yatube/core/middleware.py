@@ -0,0 +1,57 @@
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from . import perf
+from .queries import QueryInspector
+
+
+class PerformanceMiddleware:
+    """Замеряет каждый запрос и отдаёт метрики в заголовке Server-Timing.
+
+    Метрики также копятся по view и доступны сотрудникам на /perf/.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        perf.install()
+
+    def __call__(self, request):
+        metrics = perf.RequestMetrics()
+        token = perf.current.set(metrics)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(metrics.sql_wrapper)
+                    )
+                response = self.get_response(request)
+        finally:
+            perf.current.reset(token)
+        metrics.total_time = time.perf_counter() - started
+        response['Server-Timing'] = metrics.server_timing()
+        match = request.resolver_match
+        if match is not None:
+            perf.record(match.view_name, metrics)
+        return response
+
+
+class QueryInspectorMiddleware:
+    """Ищет в каждом запросе N+1 и медленные запросы и пишет их в лог."""
+
+    def __init__(self, get_response):
+        if not settings.QUERY_INSPECTOR_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        inspector = QueryInspector()
+        with inspector.capture():
+            response = self.get_response(request)
+        match = request.resolver_match
+        inspector.report(match.view_name if match else request.path)
+        return response
@@ -0,0 +1,172 @@
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache
+from django.template.backends.django import Template
+
+# Верхние границы корзин гистограммы времени ответа, мс
+BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, float('inf'))
+
+current = ContextVar('request_metrics', default=None)
+
+_registry = {}
+_registry_lock = threading.Lock()
+_installed = False
+
+
+class RequestMetrics:
+    """Метрики одного запроса: SQL, шаблоны, кеш и общее время."""
+
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.total_time = 0.0
+
+    def sql_wrapper(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_count += 1
+            self.sql_time += time.perf_counter() - started
+
+    def server_timing(self):
+        """Значение заголовка Server-Timing, длительности в мс."""
+        return ', '.join((
+            f'sql;dur={self.sql_time * 1000:.1f};'
+            f'desc="{self.sql_count} queries"',
+            f'tpl;dur={self.template_time * 1000:.1f}',
+            f'cache;desc="{self.cache_hits} hits, '
+            f'{self.cache_misses} misses"',
+            f'total;dur={self.total_time * 1000:.1f}',
+        ))
+
+
+class ViewStats:
+    """Накопленные метрики одного view в текущем процессе."""
+
+    def __init__(self):
+        self.requests = 0
+        self.buckets = [0] * len(BUCKETS)
+        self.total_time = 0.0
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def add(self, metrics):
+        self.requests += 1
+        self.buckets[
+            bisect.bisect_left(BUCKETS, metrics.total_time * 1000)
+        ] += 1
+        self.total_time += metrics.total_time
+        self.sql_count += metrics.sql_count
+        self.sql_time += metrics.sql_time
+        self.template_time += metrics.template_time
+        self.cache_hits += metrics.cache_hits
+        self.cache_misses += metrics.cache_misses
+
+    def as_dict(self):
+        per_request = max(self.requests, 1)
+        return {
+            'requests': self.requests,
+            'histogram_ms': {
+                str(bound): count
+                for bound, count in zip(BUCKETS, self.buckets)
+            },
+            'avg_total_ms': round(self.total_time * 1000 / per_request, 2),
+            'avg_sql_queries': round(self.sql_count / per_request, 2),
+            'avg_sql_ms': round(self.sql_time * 1000 / per_request, 2),
+            'avg_template_ms': round(
+                self.template_time * 1000 / per_request, 2
+            ),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+        }
+
+
+def record(view_name, metrics):
+    with _registry_lock:
+        _registry.setdefault(view_name, ViewStats()).add(metrics)
+
+
+def snapshot():
+    """Метрики всех view текущего процесса."""
+    with _registry_lock:
+        return {name: stats.as_dict() for name, stats in _registry.items()}
+
+
+def reset():
+    with _registry_lock:
+        _registry.clear()
+
+
+def timed_render(render):
+    @wraps(render)
+    def wrapper(*args, **kwargs):
+        metrics = current.get()
+        if metrics is None:
+            return render(*args, **kwargs)
+        metrics.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return render(*args, **kwargs)
+        finally:
+            metrics.template_depth -= 1
+            if not metrics.template_depth:
+                metrics.template_time += time.perf_counter() - started
+    return wrapper
+
+
+def counted_get(get):
+    missing = object()
+
+    @wraps(get)
+    def wrapper(self, key, default=None, version=None):
+        value = get(self, key, missing, version)
+        metrics = current.get()
+        if metrics is not None:
+            if value is missing:
+                metrics.cache_misses += 1
+            else:
+                metrics.cache_hits += 1
+        return default if value is missing else value
+    return wrapper
+
+
+def counted_get_many(get_many):
+    @wraps(get_many)
+    def wrapper(self, keys, version=None):
+        keys = list(keys)
+        values = get_many(self, keys, version)
+        metrics = current.get()
+        if metrics is not None:
+            metrics.cache_hits += len(values)
+            metrics.cache_misses += len(keys) - len(values)
+        return values
+    return wrapper
+
+
+def install():
+    """Оборачивает рендер шаблонов и чтение кеша подсчётом метрик."""
+    global _installed
+    if _installed:
+        return
+    Template.render = timed_render(Template.render)
+    backends = {type(caches[alias]) for alias in settings.CACHES}
+    for backend in backends:
+        backend.get = counted_get(backend.get)
+        # Общий get_many сам вызывает get, его считать не нужно
+        if backend.get_many is not BaseCache.get_many:
+            backend.get_many = counted_get_many(backend.get_many)
+    _installed = True
@@ -0,0 +1,10 @@
+import pytest
+
+from core.queries import assert_no_query_issues
+
+
+@pytest.fixture
+def query_inspector():
+    """Роняет тест, если в нём есть N+1 или медленные запросы."""
+    with assert_no_query_issues() as inspector:
+        yield inspector
@@ -0,0 +1,148 @@
+import logging
+import os
+import re
+import sys
+import time
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.template.base import Template
+
+logger = logging.getLogger(__name__)
+
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+IN_LIST_RE = re.compile(r'\bIN\s*\((?:\s*(?:%s|\?)\s*,?)+\)', re.IGNORECASE)
+PARAM_RE = re.compile(r'%s|\?')
+SPACE_RE = re.compile(r'\s+')
+
+THIS_FILE = os.path.abspath(__file__)
+
+
+def normalize(sql):
+    """Приводит SQL к форме запроса: без значений и длины списков IN."""
+    sql = STRING_RE.sub('?', sql)
+    sql = NUMBER_RE.sub('?', sql)
+    sql = PARAM_RE.sub('?', sql)
+    sql = IN_LIST_RE.sub('IN (...)', sql)
+    return SPACE_RE.sub(' ', sql).strip()
+
+
+def query_origin():
+    """Шаблон и строка кода проекта, откуда выполнен запрос."""
+    template = code = None
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if code is None and filename != THIS_FILE and filename.startswith(
+            str(settings.BASE_DIR)
+        ):
+            code = f'{filename}:{frame.f_lineno} in {frame.f_code.co_name}'
+        # type(), а не isinstance(): isinstance вычислил бы ленивые
+        # объекты вроде request.user и выполнил бы новый запрос
+        instance = frame.f_locals.get('self')
+        if template is None and issubclass(type(instance), Template):
+            template = instance.origin.name
+        if code is not None and template is not None:
+            break
+        frame = frame.f_back
+    return template, code
+
+
+class Issue:
+    """Найденная проблема: повторяющийся или медленный запрос."""
+
+    def __init__(self, kind, sql, count, duration, template, code):
+        self.kind = kind
+        self.sql = sql
+        self.count = count
+        self.duration = duration
+        self.template = template
+        self.code = code
+
+    def __str__(self):
+        where = ', '.join(
+            part for part in (self.template, self.code) if part
+        ) or 'неизвестно'
+        if self.kind == 'repeated':
+            return (
+                f'N+1: запрос выполнен {self.count} раз ({where}): '
+                f'{self.sql}'
+            )
+        return (
+            f'Медленный запрос {self.duration * 1000:.0f} мс ({where}): '
+            f'{self.sql}'
+        )
+
+
+class QueryInspector:
+    """Собирает запросы и находит N+1 и медленные запросы.
+
+    repeat_threshold — сколько одинаковых по форме запросов считается
+    N+1, slow_ms — с какой длительности запрос считается медленным.
+    """
+
+    def __init__(self, repeat_threshold=None, slow_ms=None):
+        self.repeat_threshold = (
+            repeat_threshold or settings.QUERY_REPEAT_THRESHOLD
+        )
+        self.slow_ms = slow_ms or settings.SLOW_QUERY_MS
+        self.shapes = defaultdict(list)
+        self.slow = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            shape = normalize(sql)
+            origin = query_origin()
+            self.shapes[shape].append(origin)
+            if duration * 1000 >= self.slow_ms:
+                self.slow.append((sql, duration, origin))
+
+    @contextmanager
+    def capture(self):
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            yield self
+
+    def issues(self):
+        issues = [
+            Issue('repeated', shape, len(origins), 0, *origins[0])
+            for shape, origins in self.shapes.items()
+            if len(origins) >= self.repeat_threshold
+        ]
+        issues.extend(
+            Issue('slow', sql, 1, duration, *origin)
+            for sql, duration, origin in self.slow
+        )
+        return issues
+
+    def report(self, view_name):
+        """Пишет найденные проблемы в лог и возвращает их."""
+        issues = self.issues()
+        for issue in issues:
+            logger.warning('%s: %s', view_name, issue)
+        return issues
+
+
+@contextmanager
+def assert_no_query_issues(repeat_threshold=None, slow_ms=None):
+    """Падает с AssertionError, если в блоке есть N+1 или медленный запрос.
+
+    Подходит и для TestCase, и для фикстуры pytest query_inspector.
+    """
+    inspector = QueryInspector(repeat_threshold, slow_ms)
+    with inspector.capture():
+        yield inspector
+    issues = inspector.issues()
+    if issues:
+        raise AssertionError(
+            'Найдены проблемы с запросами:\n'
+            + '\n'.join(str(issue) for issue in issues)
+        )
@@ -0,0 +1,23 @@
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """SQLite, в котором atomic() может начинаться с BEGIN IMMEDIATE.
+
+    Режим задаётся ключом TRANSACTION_MODE в настройках базы, а для
+    отдельной транзакции — атрибутом соединения transaction_mode.
+    С IMMEDIATE транзакция сразу берёт блокировку записи и ждёт её
+    по busy_timeout, а не падает с «database is locked», когда чтение
+    внутри транзакции пытается перейти в запись.
+    """
+
+    transaction_mode = None
+
+    def _start_transaction_under_autocommit(self):
+        mode = self.transaction_mode or self.settings_dict.get(
+            'TRANSACTION_MODE'
+        )
+        if mode:
+            self.cursor().execute(f'BEGIN {mode}')
+        else:
+            super()._start_transaction_under_autocommit()
@@ -0,0 +1,50 @@
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = (
+    '.css', '.js', '.map', '.svg', '.json', '.txt', '.html', '.xml', '.ico',
+)
+# Сжатая копия сохраняется, только если она меньше хотя бы на столько
+MIN_SAVING = 0.05
+
+
+def compressors():
+    """Кодировки и функции сжатия: brotli — если пакет установлен."""
+    result = {'gz': lambda data: gzip.compress(data, 9, mtime=0)}
+    if brotli is not None:
+        result['br'] = brotli.compress
+    return result
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Статика с хешем содержимого в именах и заранее сжатыми копиями.
+
+    collectstatic кладёт рядом с каждым сжимаемым файлом копии .gz и,
+    если установлен пакет brotli, .br; core.files.FileServer отдаёт их
+    клиентам, которые принимают такие кодировки.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if name.endswith(COMPRESSIBLE) and self.exists(name):
+                self.compress(name)
+
+    def compress(self, name):
+        with self.open(name) as file:
+            data = file.read()
+        for suffix, compress in compressors().items():
+            compressed = compress(data)
+            if len(compressed) > len(data) * (1 - MIN_SAVING):
+                continue
+            with open(f'{self.path(name)}.{suffix}', 'wb') as file:
+                file.write(compressed)
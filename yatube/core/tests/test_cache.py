@@ -0,0 +1,133 @@
+import os
+import tempfile
+import time
+from multiprocessing import get_context
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from core.cache import SQLiteCache
+
+
+def make_cache(path, **options):
+    return SQLiteCache(path, {'OPTIONS': options})
+
+
+def incr_many(path, times):
+    cache = make_cache(path)
+    for _ in range(times):
+        cache.incr('counter')
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'cache.sqlite3')
+        self.cache = make_cache(self.path)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_basic_operations(self):
+        cache = self.cache
+        cache.set('key', {'value': 1})
+        self.assertEqual(cache.get('key'), {'value': 1})
+        self.assertFalse(cache.add('key', 'other'))
+        self.assertTrue(cache.add('new', 'value', None))
+        cache.set_many({'a': 1, 'b': 2})
+        self.assertEqual(
+            cache.get_many(['a', 'b', 'missing']), {'a': 1, 'b': 2}
+        )
+        cache.delete_many(['a', 'b'])
+        self.assertIsNone(cache.get('a'))
+        cache.set('counter', 1)
+        self.assertEqual(cache.incr('counter'), 2)
+        self.assertEqual(cache.decr('counter', 2), 0)
+        with self.assertRaises(ValueError):
+            cache.incr('missing')
+        cache.clear()
+        self.assertNotIn('key', cache)
+
+    def test_expiry(self):
+        self.cache.set('key', 'value', 0.05)
+        self.assertIn('key', self.cache)
+        time.sleep(0.1)
+        self.assertIsNone(self.cache.get('key'))
+        self.assertTrue(self.cache.add('key', 'again'))
+
+    def test_lru_eviction(self):
+        cache = make_cache(self.path, MAX_ENTRIES=3, CULL_FREQUENCY=10)
+        for number in range(3):
+            cache.set(f'key{number}', number)
+            time.sleep(0.01)
+        cache._connection().execute(
+            "UPDATE cache SET accessed = 0 WHERE key LIKE '%key1'"
+        )
+        cache.set('key3', 3)
+        self.assertIsNone(cache.get('key1'))
+        self.assertEqual(
+            cache.get_many(['key0', 'key2', 'key3']),
+            {'key0': 0, 'key2': 2, 'key3': 3},
+        )
+
+    def test_size_limit(self):
+        cache = make_cache(self.path, MAX_BYTES=3000, CULL_FREQUENCY=10)
+        for number in range(5):
+            cache.set(f'key{number}', 'x' * 1000)
+            time.sleep(0.01)
+        self.assertEqual(
+            sorted(cache.get_many([f'key{n}' for n in range(5)])),
+            ['key3', 'key4'],
+        )
+
+    def test_cull_leaves_headroom(self):
+        """Переполнение чистит сначала истёкшие ключи, затем с запасом."""
+        cache = make_cache(self.path, MAX_ENTRIES=10, CULL_FREQUENCY=5)
+        cache.set('expired', 'value', 0.01)
+        cache.set_many({f'key{number}': number for number in range(9)})
+        time.sleep(0.05)
+        cache.set('key9', 9)
+        self.assertEqual(cache._totals(cache._connection())[0], 10)
+        self.assertNotIn('expired', cache)
+        cache.set('key10', 10)
+        count, size = cache._totals(cache._connection())
+        self.assertEqual(count, 8)
+        self.assertEqual(
+            (count, size),
+            cache._connection().execute(
+                'SELECT count(*), sum(size) FROM cache'
+            ).fetchone(),
+        )
+
+    def test_access_times_are_written_in_batches(self):
+        cache = self.cache
+        cache.set_many({f'key{number}': number for number in range(3)})
+        db = cache._connection()
+        db.execute('UPDATE cache SET accessed = 0')
+        with mock.patch('core.cache.ACCESS_BATCH_SIZE', 3):
+            cache.get_many(['key0', 'key1'])
+            self.assertEqual(
+                db.execute('SELECT max(accessed) FROM cache').fetchone(),
+                (0,),
+            )
+            cache.get('key2')
+        self.assertEqual(
+            db.execute(
+                'SELECT count(*) FROM cache WHERE accessed > 0'
+            ).fetchone(),
+            (3,),
+        )
+
+    def test_shared_between_processes(self):
+        """Счётчик общий для процессов, incr не теряет обновлений."""
+        self.cache.set('counter', 0, None)
+        context = get_context('fork')
+        processes = [
+            context.Process(target=incr_many, args=(self.path, 50))
+            for _ in range(4)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        self.assertEqual(self.cache.get('counter'), 200)
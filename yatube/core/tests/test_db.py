@@ -0,0 +1,73 @@
+import os
+import sqlite3
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.db import apply_pragmas, serialized_write
+from posts.models import Post, User
+
+
+class SQLiteProfileTests(TestCase):
+    def test_production_pragmas(self):
+        """Профиль production включает WAL и ожидание блокировки."""
+        with tempfile.TemporaryDirectory() as directory:
+            db = sqlite3.connect(os.path.join(directory, 'test.sqlite3'))
+            apply_pragmas(db, settings.SQLITE_PROFILES['production'])
+            self.assertEqual(
+                db.execute('PRAGMA journal_mode').fetchone()[0], 'wal'
+            )
+            self.assertEqual(
+                db.execute('PRAGMA busy_timeout').fetchone()[0], 5000
+            )
+            db.close()
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command(
+            'benchmark_sqlite', seconds=0.2, writers=2, readers=1, stdout=out
+        )
+        self.assertIn('production', out.getvalue())
+
+
+class SerializedWriteTests(TransactionTestCase):
+    def test_serialized_write_is_atomic_and_reentrant(self):
+        user = User.objects.create_user(username='Loly')
+        with self.assertRaises(ValueError):
+            with serialized_write():
+                with serialized_write():
+                    Post.objects.create(author=user, text='Тестовый пост')
+                self.assertTrue(connection.in_atomic_block)
+                raise ValueError
+        self.assertFalse(Post.objects.exists())
+
+    def test_immediate_transaction_mode(self):
+        settings_dict = connection.settings_dict
+        settings_dict['TRANSACTION_MODE'] = 'IMMEDIATE'
+        try:
+            with CaptureQueriesContext(connection) as context:
+                with transaction.atomic():
+                    User.objects.create_user(username='Loly')
+        finally:
+            settings_dict['TRANSACTION_MODE'] = None
+        self.assertEqual(context.captured_queries[0]['sql'], 'BEGIN IMMEDIATE')
+        self.assertTrue(User.objects.filter(username='Loly').exists())
+
+    def test_immediate_serialized_write(self):
+        """immediate=True берёт блокировку записи при любом профиле."""
+        with CaptureQueriesContext(connection) as context:
+            with serialized_write(immediate=True):
+                User.objects.create_user(username='Loly')
+            with serialized_write():
+                User.objects.create_user(username='Other')
+        begins = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('BEGIN')
+        ]
+        self.assertEqual(begins, ['BEGIN IMMEDIATE', 'BEGIN'])
+        self.assertIsNone(connection.transaction_mode)
@@ -0,0 +1,129 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core.files import FileServer, parse_range
+
+STATIC_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def django_app(environ, start_response):
+    start_response('404 Not Found', [])
+    return [b'django']
+
+
+@override_settings(
+    STATIC_ROOT=STATIC_ROOT,
+    MEDIA_ROOT=MEDIA_ROOT,
+    STATICFILES_STORAGE='core.storage.CompressedManifestStaticFilesStorage',
+)
+class FileServerTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command('collectstatic', interactive=False, verbosity=0)
+        with open(os.path.join(MEDIA_ROOT, 'image.jpg'), 'wb') as file:
+            file.write(bytes(range(256)) * 4)
+        cls.server = FileServer(django_app)
+        cls.css_url = staticfiles_storage.url('css/bootstrap.min.css')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(STATIC_ROOT, ignore_errors=True)
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def request(self, path, method='get', **headers):
+        environ = getattr(RequestFactory(), method)(path, **headers).environ
+        result = {}
+
+        def start_response(status, response_headers):
+            result['status'] = int(status.split()[0])
+            result['headers'] = dict(response_headers)
+
+        body = b''.join(self.server(environ, start_response))
+        return result['status'], result['headers'], body
+
+    def test_hashed_static_is_compressed_and_immutable(self):
+        self.assertNotEqual(self.css_url, '/static/css/bootstrap.min.css')
+        status, headers, body = self.request(
+            self.css_url, HTTP_ACCEPT_ENCODING='gzip, deflate'
+        )
+        self.assertEqual(status, 200)
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        self.assertEqual(headers['Vary'], 'Accept-Encoding')
+        self.assertIn('immutable', headers['Cache-Control'])
+        with staticfiles_storage.open(self.css_url[len('/static/'):]) as file:
+            self.assertEqual(gzip.decompress(body), file.read())
+
+    def test_identity_for_clients_without_gzip(self):
+        status, headers, body = self.request(
+            self.css_url, HTTP_ACCEPT_ENCODING='gzip;q=0'
+        )
+        self.assertEqual(status, 200)
+        self.assertNotIn('Content-Encoding', headers)
+        self.assertEqual(len(body), int(headers['Content-Length']))
+
+    def test_unhashed_static_is_cached_briefly(self):
+        status, headers, _ = self.request('/static/css/bootstrap.min.css')
+        self.assertEqual(status, 200)
+        self.assertNotIn('immutable', headers['Cache-Control'])
+
+    def test_conditional_requests(self):
+        _, headers, _ = self.request('/media/image.jpg')
+        status, _, body = self.request(
+            '/media/image.jpg', HTTP_IF_NONE_MATCH=headers['ETag']
+        )
+        self.assertEqual((status, body), (304, b''))
+        status, _, _ = self.request(
+            '/media/image.jpg',
+            HTTP_IF_MODIFIED_SINCE=headers['Last-Modified'],
+        )
+        self.assertEqual(status, 304)
+
+    def test_media_ranges(self):
+        status, headers, body = self.request(
+            '/media/image.jpg', HTTP_RANGE='bytes=10-19'
+        )
+        self.assertEqual(status, 206)
+        self.assertEqual(headers['Content-Range'], 'bytes 10-19/1024')
+        self.assertEqual(body, bytes(range(10, 20)))
+        status, headers, _ = self.request(
+            '/media/image.jpg', HTTP_RANGE='bytes=5000-'
+        )
+        self.assertEqual(status, 416)
+        self.assertEqual(headers['Content-Range'], 'bytes */1024')
+
+    def test_head_and_methods(self):
+        status, headers, body = self.request('/media/image.jpg', 'head')
+        self.assertEqual((status, body), (200, b''))
+        self.assertEqual(headers['Content-Length'], '1024')
+        status, _, _ = self.request('/media/image.jpg', 'post')
+        self.assertEqual(status, 405)
+
+    def test_other_paths_go_to_django(self):
+        for path in ('/', '/media/missing.jpg', '/media/../manage.py'):
+            with self.subTest(path=path):
+                status, _, body = self.request(path)
+                self.assertEqual((status, body), (404, b'django'))
+
+    def test_parse_range(self):
+        cases = (
+            ('bytes=0-9', (0, 9)),
+            ('bytes=-10', (90, 99)),
+            ('bytes=90-', (90, 99)),
+            ('bytes=95-200', (95, 99)),
+            ('bytes=100-', False),
+            ('bytes=0-1,5-6', None),
+            ('items=0-1', None),
+        )
+        for header, expected in cases:
+            with self.subTest(header=header):
+                self.assertEqual(parse_range(header, 100), expected)
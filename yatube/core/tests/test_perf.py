@@ -0,0 +1,49 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core import perf
+from posts.models import Post, User
+
+
+class PerformanceMiddlewareTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Loly')
+        cls.staff = User.objects.create_user(username='Admin', is_staff=True)
+        Post.objects.create(author=cls.user, text='Тестовый пост')
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.staff_client = Client()
+        self.staff_client.force_login(PerformanceMiddlewareTests.staff)
+        cache.clear()
+        perf.reset()
+
+    def test_server_timing_header(self):
+        response = self.guest_client.get(reverse('posts:main'))
+        timing = response['Server-Timing']
+        for metric in ('sql;dur=', 'tpl;dur=', 'cache;desc=', 'total;dur='):
+            with self.subTest(metric=metric):
+                self.assertIn(metric, timing)
+        self.assertNotIn('sql;dur=0.0;desc="0 queries"', timing)
+        cached = self.guest_client.get(reverse('posts:main'))
+        self.assertIn('0 queries', cached['Server-Timing'])
+
+    def test_perf_stats_for_staff_only(self):
+        self.guest_client.get(reverse('posts:main'))
+        self.guest_client.get(reverse('posts:main'))
+        response = self.guest_client.get(reverse('perf_stats'))
+        self.assertEqual(response.status_code, 302)
+        views = self.staff_client.get(reverse('perf_stats')).json()['views']
+        self.assertEqual(views['posts:main']['requests'], 2)
+        self.assertEqual(
+            sum(views['posts:main']['histogram_ms'].values()), 2
+        )
+        self.assertGreater(views['posts:main']['cache_hits'], 0)
+        feed_cache = self.staff_client.get(
+            reverse('perf_stats')
+        ).json()['feed_cache']
+        self.assertGreater(feed_cache['hit'], 0)
+        self.assertGreater(feed_cache['miss'], 0)
@@ -0,0 +1,41 @@
+"""Страницы без N+1 под фикстурой pytest query_inspector.
+
+Запуск: pytest yatube/core/tests/test_pytest_plugin.py
+"""
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+
+@pytest.fixture
+def content(db):
+    author = User.objects.create_user(username='Loly')
+    reader = User.objects.create_user(username='Reader')
+    group = Group.objects.create(
+        title='Тестовая группа', slug='test-slug', description='Описание'
+    )
+    Post.objects.bulk_create(
+        Post(author=author, group=group, text=f'Пост {number}')
+        for number in range(15)
+    )
+    Comment.objects.bulk_create(
+        Comment(post=post, author=reader, text='Комментарий')
+        for post in Post.objects.all()
+    )
+    Follow.objects.create(user=reader, author=author)
+    cache.clear()
+    return reader
+
+
+@pytest.mark.parametrize('url', (
+    reverse('posts:main'),
+    reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+    reverse('posts:profile', kwargs={'username': 'Loly'}),
+    reverse('posts:follow_index'),
+))
+def test_pages_have_no_query_issues(client, content, query_inspector, url):
+    client.force_login(content)
+    assert client.get(url).status_code == 200
+    assert query_inspector.shapes
@@ -0,0 +1,72 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.queries import QueryInspector, assert_no_query_issues, normalize
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class NormalizeTests(TestCase):
+    def test_values_and_in_lists_collapse(self):
+        self.assertEqual(
+            normalize("SELECT * FROM t WHERE a = 'x' AND b IN (%s, %s, %s)"),
+            normalize('SELECT * FROM t WHERE a = 12 AND b IN (%s)'),
+        )
+
+
+class QueryInspectorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Loly')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug', description='Описание'
+        )
+        cls.posts = Post.objects.bulk_create(
+            Post(author=cls.user, group=cls.group, text=f'Пост {number}')
+            for number in range(15)
+        )
+        post = Post.objects.first()
+        Comment.objects.bulk_create(
+            Comment(post=post, author=cls.reader, text=f'Комментарий {n}')
+            for n in range(10)
+        )
+        Follow.objects.create(user=cls.reader, author=cls.user)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(QueryInspectorTests.reader)
+        cache.clear()
+
+    def test_n_plus_one_is_detected(self):
+        inspector = QueryInspector(repeat_threshold=5, slow_ms=10_000)
+        with inspector.capture():
+            for post in Post.objects.all():
+                post.author.username
+        issues = inspector.issues()
+        self.assertEqual(len(issues), 1)
+        self.assertEqual(issues[0].kind, 'repeated')
+        self.assertEqual(issues[0].count, 15)
+        self.assertIn('test_queries.py', issues[0].code)
+
+    def test_assert_no_query_issues_raises(self):
+        with self.assertRaisesMessage(AssertionError, 'N+1'):
+            with assert_no_query_issues(repeat_threshold=5):
+                for post in Post.objects.all():
+                    post.author.username
+
+    def test_pages_have_no_query_issues(self):
+        post = Post.objects.first()
+        urls = (
+            reverse('posts:main'),
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'Loly'}),
+            reverse('posts:post_detail', kwargs={'post_id': post.pk}),
+            reverse('posts:follow_index'),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                with assert_no_query_issues():
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
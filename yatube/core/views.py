@@ -1,5 +1,13 @@
+import os
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
 from django.shortcuts import render
 
+from posts import caching
+
+from . import perf
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
@@ -15,3 +23,16 @@ def server_error(request):
 
 def permission_denied(request, exception):
     return render(request, 'core/403.html', status=403)
+
+
+@staff_member_required
+def perf_stats(request):
+    """Метрики запросов по view и счётчики кеша лент текущего процесса."""
+    return JsonResponse(
+        {
+            'pid': os.getpid(),
+            'views': perf.snapshot(),
+            'feed_cache': caching.stats(),
+        },
+        json_dumps_params={'ensure_ascii': False, 'indent': 2},
+    )
@@ -0,0 +1,193 @@
+import hashlib
+import math
+import random
+import threading
+import time
+from collections import Counter
+from functools import wraps
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.cache import cache
+
+VERSION_KEY = 'feed-version:{}'
+
+# Насколько охотно страница пересчитывается до истечения срока жизни
+EARLY_RECOMPUTE_BETA = 1.0
+# Сколько запрос без готовой копии ждёт чужой пересборки страницы
+REBUILD_WAIT = 1.0
+REBUILD_POLL_INTERVAL = 0.05
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def new_version():
+    """Начальный номер поколения.
+
+    Номер берётся из часов, а не с единицы: если кеш вытеснит счётчик,
+    новый отсчёт не повторит прежних номеров, и старые страницы и ETag
+    не станут снова актуальными.
+    """
+    return time.time_ns()
+
+
+def feed_versions(scopes):
+    """Возвращает текущие номера поколений для списка лент."""
+    keys = [VERSION_KEY.format(quote(scope)) for scope in scopes]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            version = new_version()
+            cache.add(key, version, None)
+            versions[key] = cache.get(key, version)
+    return [versions[key] for key in keys]
+
+
+def bump(*scopes):
+    """Сдвигает поколения лент, после чего их старый кеш не читается."""
+    for scope in scopes:
+        key = VERSION_KEY.format(quote(scope))
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, new_version(), None)
+
+
+def feed_cache_keys(request, scopes):
+    """Ключ страницы в текущих поколениях лент и ключ её последней копии.
+
+    По второму ключу лежит последняя построенная версия страницы в любом
+    поколении: её отдают, пока другой запрос строит свежую. Списки лент
+    и поколений хешируются: у ленты подписок их столько же, сколько
+    авторов в подписках.
+    """
+    versions = '.'.join(str(version) for version in feed_versions(scopes))
+    versions = hashlib.md5(versions.encode()).hexdigest()
+    user = request.user.pk if request.user.is_authenticated else 'anon'
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    scopes = hashlib.md5(quote(':'.join(scopes)).encode()).hexdigest()
+    return (
+        f'feed:{scopes}:{versions}:{user}:{path}',
+        f'feed-stale:{scopes}:{user}:{path}',
+    )
+
+
+def feed_etag(request, scopes):
+    """ETag ответа, который меняется вместе с поколениями его лент.
+
+    Считается по кешу без обращения к базе, поэтому клиент с актуальной
+    копией получает 304 без построения ответа.
+    """
+    versions = '.'.join(str(version) for version in feed_versions(scopes))
+    return hashlib.md5(
+        f'{request.get_full_path()}|{versions}'.encode()
+    ).hexdigest()
+
+
+def etag_func(*scopes):
+    """etag_func для condition(): ETag по поколениям лент scopes.
+
+    scopes — шаблоны лент, в которые подставляются аргументы view,
+    например 'group:{slug}'.
+    """
+    def etag(request, **kwargs):
+        return feed_etag(
+            request, [scope.format(**kwargs) for scope in scopes]
+        )
+    return etag
+
+
+def record(event):
+    with _stats_lock:
+        _stats[event] += 1
+
+
+def stats():
+    """Счётчики кеша лент текущего процесса: hit, stale, miss, rebuild."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def is_fresh(entry):
+    """Проверка свежести с вероятностным ранним пересчётом (XFetch).
+
+    Чем дольше строилась страница и чем ближе срок её жизни, тем
+    вероятнее, что очередной запрос пересчитает её заранее, и истечение
+    не приходится на множество запросов одновременно.
+    """
+    early = entry['delta'] * EARLY_RECOMPUTE_BETA * -math.log(
+        1.0 - random.random()
+    )
+    return time.time() + early < entry['expires']
+
+
+def wait_for(key):
+    """Ждёт, пока другой запрос положит страницу в кеш."""
+    deadline = time.monotonic() + REBUILD_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(REBUILD_POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+def cache_feed(scopes):
+    """Кеширует страницу ленты до изменения любой из её лент.
+
+    scopes получает аргументы view и возвращает список лент, от
+    которых зависит страница, например ['global'] или ['group:slug'].
+    Авторизованным пользователям страница кешируется отдельно.
+    Пересобирает страницу один запрос под короткой блокировкой,
+    остальные в это время получают последнюю готовую копию или
+    дожидаются новой.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            key, stale_key = feed_cache_keys(
+                request, scopes(request, *args, **kwargs)
+            )
+            entry = cache.get(key)
+            if entry is not None and is_fresh(entry):
+                record('hit')
+                return entry['response']
+            lock_key = f'{key}:lock'
+            locked = cache.add(lock_key, 1, settings.FEED_CACHE_LOCK_TIMEOUT)
+            if not locked:
+                stale = entry or cache.get(stale_key)
+                if stale is None:
+                    stale = wait_for(key)
+                if stale is not None:
+                    record('stale')
+                    return stale['response']
+            record('miss')
+            try:
+                started = time.monotonic()
+                response = view(request, *args, **kwargs)
+                delta = time.monotonic() - started
+                if (
+                    response.status_code == 200
+                    and not response.streaming
+                    and not request.META.get('CSRF_COOKIE_USED')
+                ):
+                    entry = {
+                        'response': response,
+                        'expires': time.time() + settings.FEED_CACHE_TIMEOUT,
+                        'delta': delta,
+                    }
+                    cache.set_many(
+                        {key: entry, stale_key: entry},
+                        settings.FEED_CACHE_TIMEOUT
+                        + settings.FEED_CACHE_STALE_TIMEOUT,
+                    )
+                    record('rebuild')
+            finally:
+                if locked:
+                    cache.delete(lock_key)
+            return response
+        return wrapper
+    return decorator
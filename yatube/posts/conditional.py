@@ -0,0 +1,83 @@
+import hashlib
+
+from django.db.models import Exists, Max, OuterRef, Subquery
+from django.views.decorators.http import condition
+
+from . import caching
+from .models import Follow, Group, Post, User
+
+
+def page_condition(state):
+    """condition() с ETag из одного запроса к базе.
+
+    state получает аргументы view и возвращает значения, от которых
+    зависит страница, или None, если объекта нет. ETag учитывает ещё и
+    текущего пользователя. Last-Modified не отдаётся: удаление поста или
+    комментария не сдвигает ни одну дату, и ответ по дате был бы
+    устаревшим.
+    """
+    def etag(request, *args, **kwargs):
+        if not hasattr(request, '_page_state'):
+            request._page_state = state(request, *args, **kwargs)
+        if request._page_state is None:
+            return None
+        return hashlib.md5(
+            f'{request.user.pk}|{request._page_state}'.encode()
+        ).hexdigest()
+
+    return condition(etag_func=etag)
+
+
+def last_updated(**filters):
+    """Время последней правки постов по индексу (…, -updated)."""
+    return Subquery(
+        Post.objects.filter(**filters)
+        .order_by('-updated')
+        .values('updated')[:1]
+    )
+
+
+def post_detail_state(request, post_id):
+    return (
+        Post.objects.filter(pk=post_id)
+        .annotate(last_comment=Max('comments__created'))
+        .values_list(
+            'updated', 'last_comment', 'comments_count',
+            'author__stats__posts_count', 'group__title',
+        )
+        .first()
+    )
+
+
+def group_state(request, slug):
+    """Группа, последняя правка её постов и поколение её ленты.
+
+    Поколение ленты сдвигается и при удалении поста, которое дата
+    последней правки не показывает, а читается из кеша без запроса.
+    """
+    row = (
+        Group.objects.filter(slug=slug)
+        .annotate(last_post=last_updated(group=OuterRef('pk')))
+        .values_list('title', 'description', 'last_post')
+        .first()
+    )
+    if row is None:
+        return None
+    return row, caching.feed_versions([f'group:{slug}'])
+
+
+def profile_state(request, username):
+    """Последняя правка постов автора и его счётчики из UserStats."""
+    authors = User.objects.filter(username=username).annotate(
+        last_post=last_updated(author=OuterRef('pk'))
+    )
+    fields = [
+        'last_post', 'stats__posts_count',
+        'stats__followers_count', 'stats__following_count',
+    ]
+    if request.user.is_authenticated:
+        authors = authors.annotate(is_following=Exists(
+            Follow.objects.filter(user=request.user, author=OuterRef('pk'))
+        ))
+        fields.append('is_following')
+    return authors.values_list(*fields).first()
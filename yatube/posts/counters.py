@@ -0,0 +1,69 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Follow, Post, User, UserStats
+
+
+def count_subquery(queryset, field):
+    """Подзапрос с числом строк queryset, где field равен OuterRef('pk')."""
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(count=Count('pk'))
+            .values('count')
+        ),
+        0,
+    )
+
+
+def bump_user(user_id, **deltas):
+    """Атомарно сдвигает счётчики пользователя на deltas.
+
+    Счётчики не уходят ниже нуля, а если строки со счётчиками ещё нет,
+    она создаётся пересчётом.
+    """
+    stats = UserStats.objects.filter(user_id=user_id)
+    for field, delta in deltas.items():
+        if delta < 0:
+            stats = stats.filter(**{f'{field}__gte': -delta})
+    updated = stats.update(
+        **{field: F(field) + delta for field, delta in deltas.items()}
+    )
+    if not updated and any(delta > 0 for delta in deltas.values()):
+        reconcile_users(User.objects.filter(pk=user_id))
+
+
+def bump_post_comments(post_id, delta):
+    if post_id is not None:
+        Post.objects.filter(
+            pk=post_id, comments_count__gte=-delta
+        ).update(
+            comments_count=F('comments_count') + delta
+        )
+
+
+def reconcile_users(users=None):
+    """Пересчитывает счётчики пользователей по фактическим данным."""
+    if users is None:
+        users = User.objects.all()
+    missing = users.filter(stats__isnull=True).values_list('pk', flat=True)
+    UserStats.objects.bulk_create(
+        (UserStats(user_id=pk) for pk in missing),
+        ignore_conflicts=True,
+    )
+    return UserStats.objects.filter(user__in=users).update(
+        posts_count=count_subquery(Post.objects.all(), 'author'),
+        followers_count=count_subquery(Follow.objects.all(), 'author'),
+        following_count=count_subquery(Follow.objects.all(), 'user'),
+    )
+
+
+def reconcile_posts(posts=None):
+    """Пересчитывает число комментариев у постов."""
+    if posts is None:
+        posts = Post.objects.all()
+    return posts.update(
+        comments_count=count_subquery(Comment.objects.all(), 'post'),
+    )
@@ -0,0 +1,131 @@
+from django.contrib.syndication.views import Feed
+from django.shortcuts import get_object_or_404
+from django.template.defaultfilters import linebreaksbr, truncatechars
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+from django.views.decorators.http import condition
+
+from . import caching
+from .caching import cache_feed
+from .models import Group, Post, User
+
+# Сколько последних постов попадает в ленту
+FEED_ITEMS = 20
+TITLE_LENGTH = 60
+
+
+class LatestPostsFeed(Feed):
+    """RSS последних постов сайта."""
+
+    title = 'Yatube: последние записи'
+    description = 'Новые записи на сайте Yatube'
+
+    def link(self, obj):
+        return reverse('posts:main')
+
+    def posts(self, obj):
+        return Post.objects.all()
+
+    def items(self, obj):
+        return self.posts(obj).select_related('author', 'group').order_by(
+            '-pub_date', '-pk'
+        )[:FEED_ITEMS]
+
+    def item_title(self, item):
+        return truncatechars(item.text, TITLE_LENGTH)
+
+    def item_description(self, item):
+        return linebreaksbr(item.text)
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', kwargs={'post_id': item.pk})
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_updateddate(self, item):
+        return item.updated
+
+    def item_categories(self, item):
+        return [item.group.title] if item.group else []
+
+
+class GroupPostsFeed(LatestPostsFeed):
+    """RSS последних постов группы."""
+
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug)
+
+    def title(self, obj):
+        return f'Yatube: {obj.title}'
+
+    def description(self, obj):
+        return obj.description
+
+    def link(self, obj):
+        return reverse('posts:group_list', kwargs={'slug': obj.slug})
+
+    def posts(self, obj):
+        return obj.posts.all()
+
+
+class AuthorPostsFeed(LatestPostsFeed):
+    """RSS последних постов автора."""
+
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def title(self, obj):
+        return f'Yatube: записи {obj.username}'
+
+    def description(self, obj):
+        return f'Новые записи пользователя {obj.username}'
+
+    def link(self, obj):
+        return reverse('posts:profile', kwargs={'username': obj.username})
+
+    def posts(self, obj):
+        return obj.posts.all()
+
+
+class LatestPostsAtomFeed(LatestPostsFeed):
+    feed_type = Atom1Feed
+    subtitle = LatestPostsFeed.description
+
+
+class GroupPostsAtomFeed(GroupPostsFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return obj.description
+
+
+class AuthorPostsAtomFeed(AuthorPostsFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self.description(obj)
+
+
+def feed_view(feed, *scopes):
+    """Лента как view: в кеше до изменения лент scopes и с ETag.
+
+    scopes — шаблоны лент, как у caching.etag_func.
+    """
+    view = cache_feed(
+        lambda request, **kwargs: [
+            scope.format(**kwargs) for scope in scopes
+        ]
+    )(feed)
+    return condition(etag_func=caching.etag_func(*scopes))(view)
+
+
+latest_rss = feed_view(LatestPostsFeed(), 'global')
+latest_atom = feed_view(LatestPostsAtomFeed(), 'global')
+group_rss = feed_view(GroupPostsFeed(), 'group:{slug}')
+group_atom = feed_view(GroupPostsAtomFeed(), 'group:{slug}')
+author_rss = feed_view(AuthorPostsFeed(), 'author:{username}')
+author_atom = feed_view(AuthorPostsAtomFeed(), 'author:{username}')
@@ -0,0 +1,91 @@
+from django.db import IntegrityError, connection, transaction
+
+from . import caching, counters, timeline
+from .models import Follow, User
+
+
+def follow(user, author):
+    """Подписывает пользователя на автора одним INSERT.
+
+    Повторную подписку и подписку на себя отсекают ограничения базы,
+    поэтому одновременные запросы не создают дублей.
+    Возвращает True, если подписка новая.
+    """
+    if user.pk == author.pk:
+        return False
+    try:
+        with transaction.atomic():
+            Follow.objects.create(user=user, author=author)
+    except IntegrityError:
+        return False
+    return True
+
+
+def follow_many(user, authors):
+    """Подписывает пользователя сразу на многих авторов.
+
+    Подписки вставляются одним bulk_create, после чего счётчики,
+    лента и кеш обновляются один раз на всю пачку.
+    Возвращает число новых подписок.
+    """
+    author_ids = {author.pk for author in authors} - {user.pk}
+    author_ids -= set(
+        Follow.objects.filter(user=user, author_id__in=author_ids)
+        .values_list('author_id', flat=True)
+    )
+    if not author_ids:
+        return 0
+    with transaction.atomic():
+        Follow.objects.bulk_create(
+            (Follow(user=user, author_id=pk) for pk in author_ids),
+            ignore_conflicts=True,
+        )
+        affected = User.objects.filter(pk__in=author_ids | {user.pk})
+        counters.reconcile_users(affected)
+        if timeline.enabled():
+            timeline.rebuild(user.pk)
+    caching.bump(
+        f'timeline:{user.pk}',
+        *(
+            f'author:{username}'
+            for username in affected.values_list('username', flat=True)
+        ),
+    )
+    return len(author_ids)
+
+
+def unfollow_many(user, authors):
+    """Отписывает пользователя от многих авторов одним DELETE.
+
+    authors — список или queryset авторов. Подписки удаляются прямым
+    DELETE без сигналов, а счётчики, лента и кеш обновляются один раз на всю
+    пачку, как в follow_many.
+    Возвращает число удалённых подписок.
+    """
+    author_ids = set(
+        Follow.objects.filter(user=user, author__in=authors)
+        .values_list('author_id', flat=True)
+    )
+    if not author_ids:
+        return 0
+    with transaction.atomic():
+        placeholders = ', '.join(['%s'] * len(author_ids))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {Follow._meta.db_table} '
+                f'WHERE user_id = %s AND author_id IN ({placeholders})',
+                [user.pk, *author_ids],
+            )
+            deleted = cursor.rowcount
+        affected = User.objects.filter(pk__in=author_ids | {user.pk})
+        counters.reconcile_users(affected)
+        if timeline.enabled():
+            timeline.remove(user.pk, author_ids)
+    caching.bump(
+        f'timeline:{user.pk}',
+        *(
+            f'author:{username}'
+            for username in affected.values_list('username', flat=True)
+        ),
+    )
+    return deleted
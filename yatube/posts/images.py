@@ -0,0 +1,89 @@
+import os
+import warnings
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image, ImageOps
+
+SAVE_OPTIONS = {
+    'JPEG': {'optimize': True, 'progressive': True},
+    'PNG': {'optimize': True},
+    'GIF': {},
+}
+# Что из image.info переживает пересохранение: профиль цвета и
+# прозрачность палитры. EXIF, текстовые блоки PNG и прочие метаданные
+# отбрасываются
+KEEP_INFO = ('icc_profile', 'transparency')
+
+
+def open_image(uploaded):
+    """Открывает загрузку, проверяя размеры до декодирования пикселей."""
+    if uploaded.size > settings.POST_IMAGE_MAX_BYTES:
+        raise ValidationError(
+            'Файл картинки слишком большой.', code='file_too_large'
+        )
+    uploaded.seek(0)
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', Image.DecompressionBombWarning)
+            image = Image.open(uploaded)
+    except (Image.DecompressionBombError, Image.DecompressionBombWarning):
+        raise ValidationError(
+            'Картинка слишком большая.', code='decompression_bomb'
+        )
+    except (OSError, SyntaxError):
+        raise ValidationError(
+            'Загрузите правильное изображение.', code='invalid_image'
+        )
+    width, height = image.size
+    if width * height > settings.POST_IMAGE_MAX_PIXELS:
+        raise ValidationError(
+            'Картинка слишком большая.', code='decompression_bomb'
+        )
+    return image
+
+
+def normalize_upload(uploaded):
+    """Готовит загруженную картинку поста к сохранению.
+
+    Картинка уменьшается до POST_IMAGE_MAX_SIDE по большей стороне
+    (JPEG сразу декодируется в уменьшенном виде через draft),
+    поворачивается по EXIF и пересохраняется без метаданных.
+    Анимированные картинки только проверяются и сохраняются как есть.
+    """
+    image = open_image(uploaded)
+    if getattr(image, 'is_animated', False):
+        uploaded.seek(0)
+        return uploaded
+
+    name = uploaded.name
+    image_format = image.format
+    if image_format not in SAVE_OPTIONS:
+        image_format = 'JPEG'
+        name = os.path.splitext(name)[0] + '.jpg'
+    max_side = settings.POST_IMAGE_MAX_SIDE
+    image.draft(image.mode, (max_side, max_side))
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((max_side, max_side), Image.LANCZOS, reducing_gap=3.0)
+    if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+
+    image.info = {
+        key: value for key, value in image.info.items() if key in KEEP_INFO
+    }
+
+    buffer = BytesIO()
+    options = dict(SAVE_OPTIONS[image_format])
+    if image_format == 'JPEG':
+        options['quality'] = settings.POST_IMAGE_QUALITY
+    icc_profile = image.info.get('icc_profile')
+    if icc_profile:
+        options['icc_profile'] = icc_profile
+    image.save(buffer, image_format, **options)
+    return SimpleUploadedFile(
+        name,
+        buffer.getvalue(),
+        content_type=Image.MIME[image_format],
+    )
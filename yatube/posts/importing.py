@@ -0,0 +1,263 @@
+import csv
+import json
+from abc import ABC, abstractmethod
+from itertools import islice
+
+import pytz
+from django.core.exceptions import ValidationError
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.db import serialized_write
+
+from . import caching, counters, search, timeline
+from .models import Comment, Follow, Group, Post, User
+
+
+class RowError(Exception):
+    """Строку нельзя импортировать; сообщение объясняет почему."""
+
+
+def read_rows(file, fmt):
+    """Лениво читает словари из JSONL или CSV, по одной строке.
+
+    Вместо нечитаемой строки JSONL отдаётся RowError.
+    """
+    if fmt == 'csv':
+        yield from csv.DictReader(file)
+        return
+    for line in file:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as error:
+            yield RowError(f'неверный JSON: {error}')
+
+
+def batches(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def parse_date(value):
+    if not value:
+        return timezone.now()
+    try:
+        date = parse_datetime(value)
+        if date is not None and timezone.is_naive(date):
+            date = timezone.make_aware(date)
+    except (ValueError, OverflowError, pytz.InvalidTimeError):
+        date = None
+    if date is None:
+        raise RowError(f'Неверная дата: {value}')
+    return date
+
+
+def validate(obj, exclude):
+    try:
+        obj.full_clean(exclude=exclude, validate_unique=False)
+    except ValidationError as error:
+        raise RowError('; '.join(
+            f'{field}: {" ".join(messages)}'
+            for field, messages in error.message_dict.items()
+        ))
+
+
+class Importer(ABC):
+    """Импорт строк пачками bulk_create, каждая пачка в транзакции.
+
+    Авторы и группы ищутся по словарям в памяти, сами строки читаются
+    потоком, так что память не зависит от размера входа. Работу
+    сигналов (счётчики, ленты, поисковый индекс, кеш) импорт выполняет
+    сам, пачками.
+    """
+
+    model = None
+    date_field = None
+
+    def __init__(self, batch_size=1000, max_errors=20):
+        self.batch_size = batch_size
+        self.max_errors = max_errors
+        self.users = dict(User.objects.values_list('username', 'pk'))
+        self.created = 0
+        self.errors = []
+        self.error_count = 0
+
+    def run(self, rows):
+        numbered = enumerate(rows, start=1)
+        for batch in batches(numbered, self.batch_size):
+            objects = []
+            for number, row in batch:
+                try:
+                    if isinstance(row, RowError):
+                        raise row
+                    objects.append(self.build(row))
+                except KeyError as error:
+                    self.error(f'строка {number}: нет поля {error}')
+                except (RowError, TypeError) as error:
+                    self.error(f'строка {number}: {error}')
+            objects = self.check_batch(objects)
+            if objects:
+                with serialized_write(immediate=True):
+                    self.save_batch(objects)
+                self.created += len(objects)
+        self.finish()
+        return self.created
+
+    def error(self, message):
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append(message)
+
+    def author_id(self, row):
+        username = row['author']
+        if username not in self.users:
+            raise RowError(f'Нет пользователя {username}')
+        return self.users[username]
+
+    def insert(self, objects):
+        """Вставляет пачку одним bulk_create с датами из строк.
+
+        bulk_create проставляет полю date_field с auto_now_add текущее
+        время, поэтому даты из строк возвращаются следом bulk_update по
+        id, которые база выдала вставке подряд. Подряд они идут потому,
+        что пачка пишется под блокировкой записи базы, взятой до чтения
+        наибольшего id (serialized_write(immediate=True)): другие
+        процессы не вставят строк между чтением и вставкой.
+        Возвращает наибольший id до вставки.
+        """
+        manager = self.model.objects
+        dates = [getattr(obj, self.date_field) for obj in objects]
+        last_pk = manager.aggregate(last=Max('pk'))['last'] or 0
+        manager.bulk_create(objects)
+        pks = manager.filter(pk__gt=last_pk).order_by('pk').values_list(
+            'pk', flat=True
+        )
+        for obj, pk, date in zip(objects, pks, dates):
+            obj.pk = pk
+            setattr(obj, self.date_field, date)
+        manager.bulk_update(objects, [self.date_field], batch_size=500)
+        return last_pk
+
+    @abstractmethod
+    def build(self, row):
+        """Объект модели по строке или RowError."""
+
+    def check_batch(self, objects):
+        return objects
+
+    @abstractmethod
+    def save_batch(self, objects):
+        """Сохраняет пачку и делает работу сигналов за неё."""
+
+    def finish(self):
+        pass
+
+
+class PostImporter(Importer):
+    model = Post
+    date_field = 'pub_date'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.groups = dict(Group.objects.values_list('slug', 'pk'))
+        self.author_ids = set()
+        self.group_slugs = set()
+
+    def build(self, row):
+        group = row.get('group') or None
+        if group is not None and group not in self.groups:
+            raise RowError(f'Нет группы {group}')
+        if group is not None:
+            self.group_slugs.add(group)
+        post = Post(
+            text=row['text'],
+            author_id=self.author_id(row),
+            group_id=self.groups.get(group),
+            pub_date=parse_date(row.get('pub_date')),
+        )
+        validate(post, exclude=['author', 'group', 'image'])
+        return post
+
+    def save_batch(self, posts):
+        last_pk = self.insert(posts)
+        search.index_posts_after(last_pk)
+        self.author_ids.update(post.author_id for post in posts)
+
+    def finish(self):
+        counters.reconcile_users(User.objects.filter(pk__in=self.author_ids))
+        if timeline.enabled():
+            followers = (
+                Follow.objects.filter(author_id__in=self.author_ids)
+                .values_list('user_id', flat=True)
+                .distinct()
+            )
+            for user_id in followers.iterator():
+                timeline.rebuild(user_id)
+        usernames = User.objects.filter(
+            pk__in=self.author_ids
+        ).values_list('username', flat=True)
+        caching.bump(
+            'global',
+            *(f'group:{slug}' for slug in self.group_slugs),
+            *(f'author:{username}' for username in usernames),
+            *(f'author-posts:{pk}' for pk in self.author_ids),
+        )
+
+
+class CommentImporter(Importer):
+    model = Comment
+    date_field = 'created'
+
+    def build(self, row):
+        try:
+            post_id = int(row['post'])
+        except ValueError:
+            raise RowError(f'Неверный номер поста: {row["post"]}')
+        comment = Comment(
+            text=row['text'],
+            post_id=post_id,
+            author_id=self.author_id(row),
+            created=parse_date(row.get('created')),
+        )
+        validate(comment, exclude=['post', 'author'])
+        return comment
+
+    def check_batch(self, comments):
+        existing = set(
+            Post.objects.filter(
+                pk__in={comment.post_id for comment in comments}
+            ).values_list('pk', flat=True)
+        )
+        for comment in comments:
+            if comment.post_id not in existing:
+                self.error(f'нет поста {comment.post_id}')
+        return [
+            comment for comment in comments if comment.post_id in existing
+        ]
+
+    def save_batch(self, comments):
+        self.insert(comments)
+        post_ids = {comment.post_id for comment in comments}
+        counters.reconcile_posts(Post.objects.filter(pk__in=post_ids))
+        caching.bump(*(f'post:{post_id}' for post_id in post_ids))
+
+
+IMPORTERS = {
+    'posts': PostImporter,
+    'comments': CommentImporter,
+}
+
+
+def import_rows(kind, rows, **kwargs):
+    """Импортирует строки и возвращает импортёр с итогами."""
+    importer = IMPORTERS[kind](**kwargs)
+    importer.run(rows)
+    return importer
@@ -0,0 +1,212 @@
+import json
+import random
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext, override_settings, setup_test_environment,
+    teardown_test_environment,
+)
+from django.urls import reverse
+from faker import Faker
+
+from posts import counters, search, timeline
+from posts.models import Comment, Follow, Group, Post, User
+
+# На время замера кеш по умолчанию подменяется собственным кешем
+# процесса: сброс перед запросами не задевает общий кеш сайта
+BENCHMARK_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'benchmark-feeds',
+    },
+}
+
+
+def percentile(values, percent):
+    """Перцентиль по ближайшему рангу для отсортированного списка."""
+    rank = max(1, round(percent / 100 * len(values)))
+    return values[min(rank, len(values)) - 1]
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет временную базу данными заданного объёма и замеряет '
+        'время ответа и число запросов основных страниц.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--groups', type=int, default=10)
+        parser.add_argument('--posts', type=int, default=5000)
+        parser.add_argument(
+            '--follows', type=int, default=20,
+            help='Подписок на одного пользователя',
+        )
+        parser.add_argument('--comments', type=int, default=10000)
+        parser.add_argument(
+            '--requests', type=int, default=50,
+            help='Запросов к каждой странице',
+        )
+        parser.add_argument(
+            '--cached', action='store_true',
+            help='Не сбрасывать кеш перед каждым запросом',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Файл для результатов в JSON')
+
+    def seed(self, options, fake):
+        password = make_password(None)
+        User.objects.bulk_create(
+            User(username=f'{fake.user_name()}{number}', password=password)
+            for number in range(options['users'])
+        )
+        user_ids = list(User.objects.values_list('pk', flat=True))
+        Group.objects.bulk_create(
+            Group(
+                title=fake.sentence(nb_words=3)[:200],
+                slug=f'group-{number}',
+                description=fake.text(),
+            )
+            for number in range(options['groups'])
+        )
+        group_ids = list(Group.objects.values_list('pk', flat=True)) + [None]
+        Post.objects.bulk_create(
+            (
+                Post(
+                    author_id=random.choice(user_ids),
+                    group_id=random.choice(group_ids),
+                    text=fake.text(),
+                )
+                for _ in range(options['posts'])
+            ),
+            batch_size=500,
+        )
+        post_ids = list(Post.objects.values_list('pk', flat=True))
+        Follow.objects.bulk_create(
+            (
+                Follow(user_id=user_id, author_id=author_id)
+                for user_id in user_ids
+                for author_id in random.sample(
+                    user_ids, min(options['follows'], len(user_ids))
+                )
+                if author_id != user_id
+            ),
+            batch_size=500,
+        )
+        Comment.objects.bulk_create(
+            (
+                Comment(
+                    post_id=random.choice(post_ids),
+                    author_id=random.choice(user_ids),
+                    text=fake.sentence(),
+                )
+                for _ in range(options['comments'])
+            ),
+            batch_size=500,
+        )
+        counters.reconcile_users()
+        counters.reconcile_posts()
+        if timeline.enabled():
+            for user_id in user_ids:
+                timeline.rebuild(user_id)
+        if search.available():
+            search.rebuild()
+
+    def pages(self):
+        user = User.objects.filter(follower__isnull=False).first()
+        group = Group.objects.first()
+        post = Post.objects.order_by('-comments_count').first()
+        return user, {
+            'index': reverse('posts:main'),
+            'group_posts': reverse(
+                'posts:group_list', kwargs={'slug': group.slug}
+            ),
+            'profile': reverse(
+                'posts:profile', kwargs={'username': post.author.username}
+            ),
+            'post_detail': reverse(
+                'posts:post_detail', kwargs={'post_id': post.pk}
+            ),
+            'follow_index': reverse('posts:follow_index'),
+        }
+
+    def measure(self, client, url, options):
+        timings, queries = [], []
+        for _ in range(options['requests']):
+            if not options['cached']:
+                cache.clear()
+            with CaptureQueriesContext(connection) as context:
+                started = time.perf_counter()
+                response = client.get(url)
+                timings.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                raise CommandError(
+                    f'{url} ответила со статусом {response.status_code}.'
+                )
+            queries.append(len(context))
+        timings.sort()
+        return {
+            'p50_ms': round(percentile(timings, 50), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+            'p99_ms': round(percentile(timings, 99), 2),
+            'queries': max(queries),
+        }
+
+    def run(self, options, fake):
+        """Заполняет временную базу и замеряет страницы."""
+        setup_test_environment(debug=False)
+        old_name = connection.creation.create_test_db(verbosity=0)
+        try:
+            started = time.perf_counter()
+            self.seed(options, fake)
+            seeded = time.perf_counter() - started
+            user, pages = self.pages()
+            client = Client()
+            client.force_login(user)
+            return seeded, {
+                name: self.measure(client, url, options)
+                for name, url in pages.items()
+            }
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        fake = Faker('ru_RU')
+        fake.seed_instance(options['seed'])
+        with override_settings(CACHES=BENCHMARK_CACHES):
+            seeded, results = self.run(options, fake)
+
+        self.stdout.write(f'Данные созданы за {seeded:.1f} с')
+        self.stdout.write(
+            f'{"страница":<14}{"p50, мс":>10}{"p95, мс":>10}'
+            f'{"p99, мс":>10}{"запросов":>10}'
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:<14}{result["p50_ms"]:>10}{result["p95_ms"]:>10}'
+                f'{result["p99_ms"]:>10}{result["queries"]:>10}'
+            )
+        if options['output']:
+            params = {
+                key: options[key] for key in (
+                    'users', 'groups', 'posts', 'follows', 'comments',
+                    'requests', 'cached', 'seed',
+                )
+            }
+            with open(options['output'], 'w') as file:
+                json.dump(
+                    {'params': params, 'results': results},
+                    file,
+                    ensure_ascii=False,
+                    indent=2,
+                )
+            self.stdout.write(self.style.SUCCESS(
+                f'Результаты сохранены в {options["output"]}'
+            ))
@@ -0,0 +1,53 @@
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import importing
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково импортирует посты или комментарии из JSONL или CSV. '
+        'Посты: author, text, group (slug), pub_date. '
+        'Комментарии: post (id), author, text, created.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл или - для stdin')
+        parser.add_argument(
+            '--kind', choices=sorted(importing.IMPORTERS), default='posts',
+        )
+        parser.add_argument(
+            '--format', choices=('jsonl', 'csv'),
+            help='По умолчанию определяется по расширению файла',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format']
+        if fmt is None:
+            fmt = 'csv' if os.path.splitext(path)[1] == '.csv' else 'jsonl'
+        if path == '-':
+            file = sys.stdin
+        else:
+            try:
+                file = open(path, newline='', encoding='utf-8')
+            except OSError as error:
+                raise CommandError(error)
+        try:
+            importer = importing.import_rows(
+                options['kind'],
+                importing.read_rows(file, fmt),
+                batch_size=options['batch_size'],
+            )
+        finally:
+            if file is not sys.stdin:
+                file.close()
+        for error in importer.errors:
+            self.stderr.write(error)
+        self.stdout.write(self.style.SUCCESS(
+            f'Импортировано: {importer.created}, '
+            f'пропущено строк с ошибками: {importer.error_count}'
+        ))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from posts import timeline
+from posts.models import Follow, TimelineEntry, User
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает материализованные ленты подписок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'usernames',
+            nargs='*',
+            help='Чьи ленты пересобрать (по умолчанию все)',
+        )
+
+    def handle(self, *args, **options):
+        user_ids = set(
+            Follow.objects.values_list('user_id', flat=True)
+        ) | set(
+            TimelineEntry.objects.values_list('user_id', flat=True)
+        )
+        if options['usernames']:
+            user_ids = User.objects.filter(
+                username__in=options['usernames']
+            ).values_list('pk', flat=True)
+        for user_id in user_ids:
+            timeline.rebuild(user_id)
+        self.stdout.write(
+            self.style.SUCCESS(f'Пересобрано лент: {len(user_ids)}')
+        )
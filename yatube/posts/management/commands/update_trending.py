@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = (
+        'Обновляет рейтинг популярных постов по новым комментариям. '
+        'Запускается периодически, например из cron раз в несколько минут.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help='Пересчитать рейтинг по всем комментариям окна',
+        )
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            count = trending.rebuild()
+        else:
+            count = trending.update()
+        self.stdout.write(self.style.SUCCESS(
+            f'Учтено комментариев: {count}'
+        ))
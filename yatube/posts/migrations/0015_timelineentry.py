@@ -0,0 +1,72 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:27
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_timelines(apps, schema_editor):
+    """Заполняет ленты подписок по уже существующим подпискам.
+
+    Каждому подписчику достаются TIMELINE_MAX_ENTRIES последних постов
+    его авторов, всё одним INSERT ... SELECT.
+    """
+    if settings.FOLLOW_FEED_ENGINE != 'timeline':
+        return
+    entries = apps.get_model('posts', 'TimelineEntry')._meta.db_table
+    follows = apps.get_model('posts', 'Follow')._meta.db_table
+    posts = apps.get_model('posts', 'Post')._meta.db_table
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {entries} (user_id, post_id, pub_date) '
+            'SELECT user_id, post_id, pub_date FROM ('
+            'SELECT follow.user_id, post.id AS post_id, post.pub_date, '
+            'ROW_NUMBER() OVER (PARTITION BY follow.user_id '
+            'ORDER BY post.pub_date DESC, post.id DESC) AS position '
+            f'FROM (SELECT DISTINCT user_id, author_id FROM {follows}) '
+            f'AS follow JOIN {posts} AS post '
+            'ON post.author_id = follow.author_id'
+            ') AS ranked WHERE position <= %s',
+            [settings.TIMELINE_MAX_ENTRIES],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0014_follow'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='comment',
+            options={'verbose_name': 'Комментарий'},
+        ),
+        migrations.AlterModelOptions(
+            name='follow',
+            options={'verbose_name': 'Подписка'},
+        ),
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pub_date', models.DateTimeField(verbose_name='Дата публикации')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to='posts.Post', verbose_name='Пост')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline', to=settings.AUTH_USER_MODEL, verbose_name='Подписчик')),
+            ],
+            options={
+                'verbose_name': 'Запись ленты подписок',
+                'verbose_name_plural': 'Записи ленты подписок',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['user', '-pub_date'], name='timeline_user_pub_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='timelineentry',
+            constraint=models.UniqueConstraint(fields=('user', 'post'), name='unique_timeline_entry'),
+        ),
+        migrations.RunPython(backfill_timelines, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def delete_orphaned_comments(apps, schema_editor):
+    Comment = apps.get_model('posts', 'Comment')
+    Comment.objects.filter(post__isnull=True).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_follow_constraints'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='comment',
+            options={'ordering': ('created', 'pk'), 'verbose_name': 'Комментарий'},
+        ),
+        migrations.RunPython(
+            delete_orphaned_comments, migrations.RunPython.noop
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='post',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comments', to='posts.Post', verbose_name='Пост'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'created'], name='comment_post_created_idx'),
+        ),
+    ]
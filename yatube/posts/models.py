@@ -4,6 +4,22 @@ from django.db import models
 User = get_user_model()
 
 
+class PostQuerySet(models.QuerySet):
+    """Общие выборки постов для лент и страницы поста."""
+
+    def feed(self):
+        """Посты для ленты: автор и группа забираются одним JOIN."""
+        return self.select_related('author', 'group')
+
+    def detail(self):
+        """Пост для отдельной страницы.
+
+        Счётчики автора забираются вместе с постом, комментарии
+        читаются отдельно постранично.
+        """
+        return self.feed().select_related('author__stats')
+
+
 class Group(models.Model):
     class Meta:
         verbose_name = 'Группа'
@@ -33,6 +49,10 @@ class Post(models.Model):
         auto_now_add=True,
         db_index=True,
     )
+    updated = models.DateTimeField(
+        'Дата изменения',
+        auto_now=True,
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -52,11 +72,36 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    comments_count = models.PositiveIntegerField(
+        'Число комментариев',
+        default=0,
+        editable=False,
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        indexes = (
+            models.Index(
+                fields=('author', '-pub_date'),
+                name='post_author_pub_date_idx',
+            ),
+            models.Index(
+                fields=('group', '-pub_date'),
+                name='post_group_pub_date_idx',
+            ),
+            models.Index(
+                fields=('author', '-updated'),
+                name='post_author_updated_idx',
+            ),
+            models.Index(
+                fields=('group', '-updated'),
+                name='post_group_updated_idx',
+            ),
+        )
 
     def __str__(self) -> str:
         TITLE_LENGTH = 15
@@ -66,12 +111,17 @@ class Post(models.Model):
 class Comment(models.Model):
     class Meta:
         verbose_name = 'Комментарий'
+        ordering = ('created', 'pk')
+        indexes = [
+            models.Index(
+                fields=['post', 'created'],
+                name='comment_post_created_idx',
+            ),
+        ]
 
     post = models.ForeignKey(
         Post,
-        blank=False,
-        null=True,
-        on_delete=models.SET_NULL,
+        on_delete=models.CASCADE,
         related_name='comments',
         verbose_name='Пост',
     )
@@ -93,6 +143,22 @@ class Comment(models.Model):
 class Follow(models.Model):
     class Meta:
         verbose_name = 'Подписка'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'author'),
+                name='unique_follow',
+            ),
+            models.CheckConstraint(
+                check=~models.Q(user=models.F('author')),
+                name='no_self_follow',
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('author', 'user'),
+                name='follow_author_user_idx',
+            ),
+        )
 
     user = models.ForeignKey(
         User,
@@ -106,3 +172,114 @@ class Follow(models.Model):
         related_name='following',
         verbose_name='Автор',
     )
+
+
+class TimelineEntry(models.Model):
+    class Meta:
+        verbose_name = 'Запись ленты подписок'
+        verbose_name_plural = 'Записи ленты подписок'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'post'),
+                name='unique_timeline_entry',
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', '-pub_date'),
+                name='timeline_user_pub_date_idx',
+            ),
+        )
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Подписчик',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост',
+    )
+    pub_date = models.DateTimeField(
+        'Дата публикации',
+    )
+
+
+class UserStats(models.Model):
+    class Meta:
+        verbose_name = 'Счётчики пользователя'
+        verbose_name_plural = 'Счётчики пользователей'
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь',
+    )
+    posts_count = models.PositiveIntegerField(
+        'Число постов',
+        default=0,
+    )
+    followers_count = models.PositiveIntegerField(
+        'Число подписчиков',
+        default=0,
+    )
+    following_count = models.PositiveIntegerField(
+        'Число подписок',
+        default=0,
+    )
+
+    def __str__(self) -> str:
+        return str(self.user)
+
+
+class TrendingPost(models.Model):
+    class Meta:
+        verbose_name = 'Популярный пост'
+        verbose_name_plural = 'Популярные посты'
+        ordering = ('-score',)
+        indexes = (
+            models.Index(
+                fields=('-score',),
+                name='trending_score_idx',
+            ),
+        )
+
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trending',
+        verbose_name='Пост',
+    )
+    score = models.FloatField(
+        'Рейтинг',
+    )
+    comments_count = models.PositiveIntegerField(
+        'Учтено комментариев',
+        default=0,
+    )
+
+    def __str__(self) -> str:
+        return str(self.post)
+
+
+class TrendingState(models.Model):
+    """Докуда обработаны комментарии при подсчёте популярных постов."""
+
+    class Meta:
+        verbose_name = 'Состояние рейтинга'
+        verbose_name_plural = 'Состояние рейтинга'
+
+    last_comment_id = models.PositiveIntegerField(
+        'Последний учтённый комментарий',
+        default=0,
+    )
+    updated = models.DateTimeField(
+        'Время пересчёта',
+        auto_now=True,
+    )
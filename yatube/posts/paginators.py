@@ -0,0 +1,268 @@
+import base64
+import binascii
+import heapq
+from itertools import islice
+
+from django.core.paginator import Page, Paginator
+from django.db import connection
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+CURSOR_NEXT = 'n'
+CURSOR_PREVIOUS = 'p'
+
+# Сколько окон авторов объединяется в один запрос ленты подписок:
+# SQLite ограничивает число частей составного SELECT (500)
+AUTHORS_PER_QUERY = 100
+
+
+def encode_cursor(obj, direction, field='pub_date'):
+    """Упаковывает ключ (field, id) объекта в непрозрачный токен.
+
+    obj — экземпляр модели или строка values() с полями field и id.
+    """
+    if isinstance(obj, dict):
+        value, pk = obj[field], obj['id']
+    else:
+        value, pk = getattr(obj, field), obj.pk
+    raw = f'{direction}|{value.isoformat()}|{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Распаковывает токен, для испорченного токена возвращает None."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        direction, pub_date, pk = raw.split('|')
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if direction not in (CURSOR_NEXT, CURSOR_PREVIOUS) or pub_date is None:
+        return None
+    return direction, pub_date, pk
+
+
+def keyset(posts, direction, pub_date=None, pk=None, field='pub_date',
+           descending=True):
+    """Упорядочивает объекты и отрезает их по курсору (field, id).
+
+    При descending=True CURSOR_NEXT ведёт от новых к старым,
+    при descending=False — от старых к новым.
+    """
+    if (direction == CURSOR_NEXT) == descending:
+        if pub_date is not None:
+            posts = posts.filter(
+                Q(**{f'{field}__lt': pub_date})
+                | Q(**{field: pub_date, 'pk__lt': pk})
+            )
+        return posts.order_by(f'-{field}', '-pk')
+    if pub_date is not None:
+        posts = posts.filter(
+            Q(**{f'{field}__gt': pub_date})
+            | Q(**{field: pub_date, 'pk__gt': pk})
+        )
+    return posts.order_by(field, 'pk')
+
+
+class CursorPage(Page):
+    """Страница, полученная по курсору: без номера и без COUNT(*)."""
+
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, next_cursor=None,
+                 previous_cursor=None):
+        super().__init__(object_list, None, paginator)
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return '<Cursor page>'
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    # У курсорной страницы нет номера: методы Page, завязанные на номер,
+    # возвращают None, чтобы общий код и шаблоны не падали
+    def next_page_number(self):
+        return None
+
+    def previous_page_number(self):
+        return None
+
+    def start_index(self):
+        return None
+
+    def end_index(self):
+        return None
+
+
+class CursorPaginator(Paginator):
+    """Paginator с курсорным режимом по ключу (pub_date, id).
+
+    Страницы по курсору (?cursor=...) читаются по индексу pub_date без
+    COUNT(*) и OFFSET. Обычные страницы (?page=N) открываются по старым
+    ссылкам, но тоже отдают курсоры соседних страниц, так что дальше
+    навигация идёт только по курсорам.
+    Поле ключа и направление задают cursor_field и descending.
+    """
+
+    cursor_field = 'pub_date'
+    descending = True
+
+    def __init__(self, object_list, per_page, **kwargs):
+        object_list = keyset(
+            object_list,
+            CURSOR_NEXT,
+            field=self.cursor_field,
+            descending=self.descending,
+        )
+        super().__init__(object_list, per_page, **kwargs)
+
+    def encode(self, obj, direction):
+        return encode_cursor(obj, direction, self.cursor_field)
+
+    def page(self, number):
+        page = super().page(number)
+        page.is_cursor = False
+        page.previous_cursor = None
+        page.next_cursor = None
+        if page.has_next():
+            page.next_cursor = self.encode(page[len(page) - 1], CURSOR_NEXT)
+        if page.has_previous():
+            page.previous_cursor = self.encode(page[0], CURSOR_PREVIOUS)
+        return page
+
+    def fetch(self, direction, pub_date, pk, limit):
+        """Возвращает до limit постов за курсором в порядке обхода.
+
+        Для CURSOR_NEXT посты идут от новых к старым, для
+        CURSOR_PREVIOUS — от старых к новым. Без курсора (pub_date
+        равен None) выборка начинается с самого свежего поста.
+        """
+        return list(
+            keyset(
+                self.object_list,
+                direction,
+                pub_date,
+                pk,
+                field=self.cursor_field,
+                descending=self.descending,
+            )[:limit]
+        )
+
+    def get_cursor_page(self, token):
+        """Возвращает страницу по токену, для плохого токена — первую."""
+        cursor = decode_cursor(token)
+        if cursor is None:
+            return self.get_page(1)
+        return self.cursor_page(*cursor)
+
+    def cursor_page(self, direction=CURSOR_NEXT, pub_date=None, pk=None):
+        posts = self.fetch(direction, pub_date, pk, self.per_page + 1)
+        has_more = len(posts) > self.per_page
+        posts = posts[:self.per_page]
+        if direction == CURSOR_PREVIOUS:
+            posts.reverse()
+        if not posts and pub_date is not None:
+            return self.get_page(1)
+        has_next = has_more if direction == CURSOR_NEXT else True
+        has_previous = (
+            has_more if direction == CURSOR_PREVIOUS
+            else pub_date is not None
+        )
+        return CursorPage(
+            posts,
+            self,
+            next_cursor=(
+                self.encode(posts[-1], CURSOR_NEXT) if has_next else None
+            ),
+            previous_cursor=(
+                self.encode(posts[0], CURSOR_PREVIOUS)
+                if has_previous else None
+            ),
+        )
+
+
+class TimelinePaginator(CursorPaginator):
+    """Материализованная лента подписок по дате из записей ленты."""
+
+    cursor_field = 'timeline_pub_date'
+
+
+class MergeFeedPaginator(CursorPaginator):
+    """Лента подписок, собранная слиянием лент отдельных авторов.
+
+    Для каждого автора по индексу (author, pub_date) читается короткое
+    окно ключей постов за курсором; окна всех авторов читаются одним
+    запросом UNION ALL и сливаются до размера страницы, затем посты
+    страницы забираются вторым запросом. Номеров страниц нет: любая
+    страница, включая первую, курсорная.
+    """
+
+    def __init__(self, object_list, per_page, author_ids, **kwargs):
+        self.author_ids = list(author_ids)
+        self.posts = object_list
+        object_list = object_list.filter(author_id__in=self.author_ids)
+        super().__init__(object_list, per_page, **kwargs)
+
+    def fetch(self, direction, pub_date, pk, limit):
+        order = 'DESC' if direction == CURSOR_NEXT else 'ASC'
+        windows = []
+        for start in range(0, len(self.author_ids), AUTHORS_PER_QUERY):
+            windows.append(self.fetch_windows(
+                self.author_ids[start:start + AUTHORS_PER_QUERY],
+                order, direction, pub_date, pk, limit,
+            ))
+        merged = heapq.merge(*windows, reverse=direction == CURSOR_NEXT)
+        ids = [row_pk for _, row_pk in islice(merged, limit)]
+        posts = self.posts.in_bulk(ids)
+        return [posts[row_pk] for row_pk in ids if row_pk in posts]
+
+    def fetch_windows(self, author_ids, order, direction, pub_date, pk,
+                      limit):
+        """Ключи (pub_date, id) первых limit постов окон авторов.
+
+        Окна отдельных авторов читаются по индексу (author, pub_date)
+        и склеиваются UNION ALL в один запрос. Даты сравниваются как
+        строки SQLite, их формат упорядочен так же, как сами даты.
+        """
+        parts, params = [], []
+        for author_id in author_ids:
+            window = keyset(
+                self.posts.filter(author_id=author_id),
+                direction,
+                pub_date,
+                pk,
+            ).values_list('pub_date', 'pk')[:limit]
+            sql, window_params = window.query.sql_with_params()
+            parts.append(f'SELECT * FROM ({sql})')
+            params.extend(window_params)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT * FROM ({" UNION ALL ".join(parts)}) '
+                f'ORDER BY 1 {order}, 2 {order} LIMIT %s',
+                [*params, limit],
+            )
+            return [tuple(row) for row in cursor.fetchall()]
+
+    def get_page(self, number):
+        return self.cursor_page()
+
+
+class CommentPaginator(CursorPaginator):
+    """Комментарии поста от старых к новым по индексу (post, created).
+
+    Все страницы курсорные: первая читается без курсора, следующие —
+    кнопкой «Показать ещё».
+    """
+
+    cursor_field = 'created'
+    descending = False
+
+    def get_page(self, number):
+        return self.cursor_page()
@@ -0,0 +1,186 @@
+import base64
+import binascii
+import re
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+
+from .models import Group, Post
+
+User = get_user_model()
+
+FTS_TABLE = 'posts_post_fts'
+
+CREATE_SQL = (
+    f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+    "text, tokenize = 'unicode61 remove_diacritics 2')"
+)
+
+WORD_RE = re.compile(r'\w+')
+
+
+def available():
+    """Полнотекстовый индекс есть только в SQLite (FTS5)."""
+    return connection.vendor == 'sqlite'
+
+
+def match_expression(query):
+    """Превращает пользовательский запрос в безопасное выражение MATCH.
+
+    Каждое слово ищется по префиксу, слова объединяются через AND,
+    поэтому операторы FTS5 из запроса не интерпретируются.
+    """
+    words = WORD_RE.findall(query.lower())
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def encode_cursor(score, pk):
+    raw = f'{score!r}|{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        score, pk = raw.split('|')
+        return float(score), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
+def index_post(post):
+    """Добавляет пост в индекс или обновляет его текст."""
+    if not available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post.pk])
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, text) VALUES (%s, %s)',
+            [post.pk, post.text],
+        )
+
+
+def unindex_post(post_id):
+    if not available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id])
+
+
+def index_posts_after(pk):
+    """Индексирует одним запросом все посты с id больше pk."""
+    if not available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, text) '
+            f'SELECT id, text FROM {Post._meta.db_table} WHERE id > %s',
+            [pk],
+        )
+
+
+def rebuild():
+    """Заполняет индекс заново по таблице постов."""
+    with connection.cursor() as cursor:
+        cursor.execute(CREATE_SQL)
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, text) '
+            f'SELECT id, text FROM {Post._meta.db_table}'
+        )
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')"
+        )
+        cursor.execute(f'SELECT count(*) FROM {FTS_TABLE}')
+        return cursor.fetchone()[0]
+
+
+def filter_matching(queryset, query):
+    """Оставляет в queryset постов только подходящие под запрос.
+
+    Индекс подставляется в WHERE подзапросом: id найденных постов не
+    читаются в Python, и база сама соединяет индекс с остальными
+    условиями.
+    """
+    expression = match_expression(query)
+    if not expression:
+        return queryset.none()
+    return queryset.extra(
+        where=[
+            f'{Post._meta.db_table}.id IN (SELECT rowid FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s)'
+        ],
+        params=[expression],
+    )
+
+
+def match(query, group=None, author=None, cursor=None, limit=10):
+    """Ищет посты по индексу и возвращает пары (id, score).
+
+    Результаты упорядочены по bm25 (меньше — релевантнее), а затем по
+    id; cursor — пара (score, id) последнего результата предыдущей
+    страницы. group и author — slug группы и имя автора, limit=None
+    снимает ограничение числа результатов.
+    """
+    expression = match_expression(query)
+    if not expression:
+        return []
+    sql = [
+        f'SELECT {FTS_TABLE}.rowid AS pk, bm25({FTS_TABLE}) AS score',
+        f'FROM {FTS_TABLE}',
+        f'JOIN {Post._meta.db_table} AS post',
+        f'ON post.id = {FTS_TABLE}.rowid',
+    ]
+    where = [f'{FTS_TABLE} MATCH %s']
+    params = [expression]
+    if group:
+        sql.append(
+            f'JOIN {Group._meta.db_table} AS grp ON grp.id = post.group_id'
+        )
+        where.append('grp.slug = %s')
+        params.append(group)
+    if author:
+        sql.append(
+            f'JOIN {User._meta.db_table} AS author '
+            'ON author.id = post.author_id'
+        )
+        where.append('author.username = %s')
+        params.append(author)
+    sql.append('WHERE ' + ' AND '.join(where))
+    sql = ' '.join(sql)
+    page = ['SELECT pk, score FROM (' + sql + ')']
+    if cursor is not None:
+        page.append('WHERE score > %s OR (score = %s AND pk > %s)')
+        score, pk = cursor
+        params.extend([score, score, pk])
+    page.append('ORDER BY score, pk')
+    if limit is not None:
+        page.append('LIMIT %s')
+        params.append(limit)
+    with connection.cursor() as db_cursor:
+        db_cursor.execute(' '.join(page), params)
+        return db_cursor.fetchall()
+
+
+def search_posts(query, group=None, author=None, cursor=None, limit=10):
+    """Страница результатов поиска и курсор следующей страницы.
+
+    Без FTS5 поиск сводится к LIKE по тексту без курсора.
+    """
+    if not available():
+        posts = Post.objects.feed().filter(text__icontains=query)
+        if group:
+            posts = posts.filter(group__slug=group)
+        if author:
+            posts = posts.filter(author__username=author)
+        return list(posts.order_by('-pub_date')[:limit]), None
+    position = decode_cursor(cursor) if cursor else None
+    rows = match(query, group, author, position, limit + 1)
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        pk, score = rows[-1]
+        next_cursor = encode_cursor(score, pk)
+    posts = Post.objects.feed().in_bulk([pk for pk, score in rows])
+    return [posts[pk] for pk, score in rows if pk in posts], next_cursor
@@ -0,0 +1,121 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import caching, counters, search, thumbnails, timeline
+from .models import (
+    Comment, Follow, Group, Post, TrendingPost, User, UserStats,
+)
+
+
+def post_feed_scopes(post):
+    """Ленты, на которых виден пост.
+
+    Ленты подписок зависят от поколения постов автора, поэтому
+    подписчиков здесь перебирать не нужно.
+    """
+    scopes = [
+        'global',
+        f'author:{post.author.username}',
+        f'author-posts:{post.author_id}',
+    ]
+    group_slugs = {getattr(post, '_previous_group_slug', None)}
+    if post.group_id is not None:
+        group_slugs.add(post.group.slug)
+    scopes.extend(f'group:{slug}' for slug in group_slugs if slug)
+    if TrendingPost.objects.filter(post_id=post.pk).exists():
+        scopes.append('trending')
+    return scopes
+
+
+def follow_feed_scopes(follow):
+    """Ленты, которые меняются при подписке и отписке."""
+    return [
+        f'timeline:{follow.user_id}',
+        f'author:{follow.author.username}',
+        f'author:{follow.user.username}',
+    ]
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        UserStats.objects.get_or_create(user=instance)
+
+
+@receiver(pre_save, sender=Post)
+def post_pre_save(sender, instance, **kwargs):
+    if instance.pk is not None:
+        instance._previous_group_slug = Post.objects.filter(
+            pk=instance.pk
+        ).values_list('group__slug', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.bump_user(instance.author_id, posts_count=1)
+        if timeline.enabled():
+            timeline.fan_out(instance)
+    search.index_post(instance)
+    caching.bump(*post_feed_scopes(instance), f'post:{instance.pk}')
+    if instance.image:
+        transaction.on_commit(
+            partial(thumbnails.schedule, instance.image.name)
+        )
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    counters.bump_user(instance.author_id, posts_count=-1)
+    search.unindex_post(instance.pk)
+    # Строку рейтинга к этому моменту уже удалил каскад, поэтому
+    # страница популярных сбрасывается без проверки
+    caching.bump(
+        *post_feed_scopes(instance), f'post:{instance.pk}', 'trending'
+    )
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, **kwargs):
+    caching.bump('global', f'group:{instance.slug}')
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    # Посты группы отвязываются одним UPDATE, без сигналов постов
+    caching.bump('global', f'group:{instance.slug}')
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.bump_post_comments(instance.post_id, 1)
+    caching.bump(f'post:{instance.post_id}')
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    counters.bump_post_comments(instance.post_id, -1)
+    caching.bump(f'post:{instance.post_id}')
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.bump_user(instance.author_id, followers_count=1)
+        counters.bump_user(instance.user_id, following_count=1)
+        if timeline.enabled():
+            timeline.backfill(instance.user_id, instance.author_id)
+        caching.bump(*follow_feed_scopes(instance))
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    counters.bump_user(instance.author_id, followers_count=-1)
+    counters.bump_user(instance.user_id, following_count=-1)
+    if timeline.enabled():
+        timeline.remove(instance.user_id, [instance.author_id])
+    caching.bump(*follow_feed_scopes(instance))
@@ -0,0 +1,49 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import Client, TestCase
+
+COMMAND = 'posts.management.commands.benchmark_feeds'
+
+
+@mock.patch(f'{COMMAND}.setup_test_environment', mock.Mock())
+@mock.patch(f'{COMMAND}.teardown_test_environment', mock.Mock())
+@mock.patch.object(connection.creation, 'create_test_db', mock.Mock())
+@mock.patch.object(connection.creation, 'destroy_test_db', mock.Mock())
+class BenchmarkFeedsTests(TestCase):
+    """Замер на маленьких данных в базе теста вместо временной."""
+
+    options = {
+        'users': 5, 'groups': 2, 'posts': 30, 'follows': 2,
+        'comments': 20, 'requests': 2,
+    }
+
+    def test_smoke(self):
+        cache.set('shared', 'value')
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'result.json')
+            call_command(
+                'benchmark_feeds', output=output, stdout=StringIO(),
+                **self.options,
+            )
+            with open(output) as file:
+                results = json.load(file)['results']
+        self.assertEqual(
+            set(results),
+            {'index', 'group_posts', 'profile', 'post_detail',
+             'follow_index'},
+        )
+        self.assertEqual(cache.get('shared'), 'value')
+
+    def test_failed_page_is_reported(self):
+        with mock.patch.object(
+            Client, 'get', return_value=mock.Mock(status_code=500)
+        ), self.assertRaises(CommandError):
+            call_command('benchmark_feeds', stdout=StringIO(), **self.options)
@@ -0,0 +1,107 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import caching
+from posts.models import Follow, Group, Post, User
+
+
+class FeedCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Loly')
+        Post.objects.create(author=cls.user, text='Старый пост')
+
+    def setUp(self):
+        self.guest_client = Client()
+        cache.clear()
+
+    def stats_delta(self, before):
+        after = caching.stats()
+        return {
+            event: after.get(event, 0) - before.get(event, 0)
+            for event in ('hit', 'stale', 'miss', 'rebuild')
+        }
+
+    def test_hit_miss_rebuild_counters(self):
+        before = caching.stats()
+        self.guest_client.get(reverse('posts:main'))
+        self.guest_client.get(reverse('posts:main'))
+        self.assertEqual(
+            self.stats_delta(before),
+            {'hit': 1, 'stale': 0, 'miss': 1, 'rebuild': 1},
+        )
+
+    def test_stale_copy_is_served_while_rebuilding(self):
+        """Пока страницу пересобирает другой запрос, отдаётся копия."""
+        url = reverse('posts:main')
+        old_content = self.guest_client.get(url).content
+        Post.objects.create(author=FeedCacheTests.user, text='Свежий пост')
+        add = cache.add
+
+        def locked(key, *args, **kwargs):
+            if key.endswith(':lock'):
+                return False
+            return add(key, *args, **kwargs)
+
+        before = caching.stats()
+        with mock.patch.object(cache, 'add', side_effect=locked):
+            response = self.guest_client.get(url)
+        self.assertEqual(response.content, old_content)
+        self.assertEqual(self.stats_delta(before)['stale'], 1)
+        self.assertContains(self.guest_client.get(url), 'Свежий пост')
+
+    def test_early_recompute(self):
+        """Долго строившаяся страница может пересчитаться до срока."""
+        entry = {'expires': time.time() + 60, 'delta': 10}
+        with mock.patch('posts.caching.random.random', return_value=0.5):
+            self.assertTrue(caching.is_fresh(entry))
+        with mock.patch('posts.caching.random.random', return_value=0.999):
+            self.assertFalse(caching.is_fresh(entry))
+        self.assertFalse(
+            caching.is_fresh({'expires': time.time() - 1, 'delta': 0.1})
+        )
+
+    def test_evicted_version_does_not_repeat(self):
+        """После вытеснения счётчика старые номера поколений не вернутся."""
+        old_version, = caching.feed_versions(['global'])
+        caching.bump('global')
+        cache.delete(caching.VERSION_KEY.format('global'))
+        new_version, = caching.feed_versions(['global'])
+        self.assertNotIn(new_version, (old_version, old_version + 1))
+
+    def test_follow_page_depends_on_author_not_followers(self):
+        """Новый пост сдвигает одно поколение, а не по одному на подписчика."""
+        followers = [
+            User.objects.create_user(username=f'follower{number}')
+            for number in range(3)
+        ]
+        Follow.objects.bulk_create(
+            Follow(user=follower, author=FeedCacheTests.user)
+            for follower in followers
+        )
+        client = Client()
+        client.force_login(followers[0])
+        url = reverse('posts:follow_index')
+        client.get(url)
+        scopes = [f'timeline:{follower.pk}' for follower in followers]
+        versions = caching.feed_versions(scopes)
+        Post.objects.create(author=FeedCacheTests.user, text='Новый пост')
+        self.assertEqual(caching.feed_versions(scopes), versions)
+        self.assertContains(client.get(url), 'Новый пост')
+
+    def test_group_delete_refreshes_pages(self):
+        group = Group.objects.create(
+            title='Удаляемая группа', slug='gone', description='Описание'
+        )
+        Post.objects.create(
+            author=FeedCacheTests.user, group=group, text='Пост в группе'
+        )
+        url = reverse('posts:main')
+        self.assertContains(self.guest_client.get(url), 'Удаляемая группа')
+        group.delete()
+        self.assertNotContains(self.guest_client.get(url), 'Удаляемая группа')
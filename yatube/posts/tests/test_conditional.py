@@ -0,0 +1,112 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils.http import http_date
+
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Loly')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, group=cls.group, text='Тестовый пост'
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(ConditionalGetTests.reader)
+        cache.clear()
+
+    def urls(self):
+        return (
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'Loly'}),
+        )
+
+    def test_unchanged_page_costs_one_query(self):
+        for url in self.urls():
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                with self.assertNumQueries(1):
+                    cached = self.guest_client.get(
+                        url, HTTP_IF_NONE_MATCH=response['ETag']
+                    )
+                self.assertEqual(cached.status_code, 304)
+                self.assertFalse(response.has_header('Last-Modified'))
+
+    def test_changes_invalidate_validators(self):
+        etags = {
+            url: self.guest_client.get(url)['ETag'] for url in self.urls()
+        }
+        self.post.text = 'Изменённый пост'
+        self.post.save()
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 200)
+
+    def test_deleted_post_changes_validators(self):
+        older = Post.objects.create(
+            author=self.user, group=self.group, text='Старый пост'
+        )
+        self.post.save()
+        etags = {
+            url: self.guest_client.get(url)['ETag'] for url in self.urls()[1:]
+        }
+        older.delete()
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 200)
+
+    def test_deleted_comment_changes_post_detail(self):
+        url = self.urls()[0]
+        comment = Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий'
+        )
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='Последний'
+        )
+        etag = self.guest_client.get(url)['ETag']
+        comment.delete()
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_new_comment_changes_post_detail(self):
+        url = self.urls()[0]
+        etag = self.guest_client.get(url)['ETag']
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий'
+        )
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_follow_state_changes_profile_etag(self):
+        url = reverse('posts:profile', kwargs={'username': 'Loly'})
+        response = self.authorized_client.get(url)
+        self.assertFalse(response.has_header('Last-Modified'))
+        etag = response['ETag']
+        self.assertNotEqual(etag, self.guest_client.get(url)['ETag'])
+        Follow.objects.create(user=self.reader, author=self.user)
+        response = self.authorized_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_missing_objects_are_not_found(self):
+        response = self.guest_client.get(
+            reverse('posts:group_list', kwargs={'slug': 'missing'}),
+            HTTP_IF_MODIFIED_SINCE=http_date(),
+        )
+        self.assertEqual(response.status_code, 404)
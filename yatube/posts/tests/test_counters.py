@@ -0,0 +1,58 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts.models import Comment, Follow, Post, User, UserStats
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Loly')
+        cls.follower = User.objects.create_user(username='Follower')
+
+    def stats(self, user):
+        return UserStats.objects.get(user=user)
+
+    def test_post_and_comment_counters(self):
+        post = Post.objects.create(
+            author=CountersTests.author, text='Тестовый пост'
+        )
+        self.assertEqual(self.stats(CountersTests.author).posts_count, 1)
+        comment = Comment.objects.create(
+            post=post, author=CountersTests.follower, text='Комментарий'
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        comment.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+        post.delete()
+        self.assertEqual(self.stats(CountersTests.author).posts_count, 0)
+
+    def test_follow_counters(self):
+        follow = Follow.objects.create(
+            user=CountersTests.follower, author=CountersTests.author
+        )
+        self.assertEqual(self.stats(CountersTests.author).followers_count, 1)
+        self.assertEqual(self.stats(CountersTests.follower).following_count, 1)
+        follow.delete()
+        self.assertEqual(self.stats(CountersTests.author).followers_count, 0)
+        self.assertEqual(self.stats(CountersTests.follower).following_count, 0)
+
+    def test_reconcile_repairs_drift(self):
+        post = Post.objects.create(
+            author=CountersTests.author, text='Тестовый пост'
+        )
+        Comment.objects.create(
+            post=post, author=CountersTests.follower, text='Комментарий'
+        )
+        UserStats.objects.all().delete()
+        Post.objects.update(comments_count=5)
+        call_command('reconcile_counters', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(self.stats(CountersTests.author).posts_count, 1)
+        self.assertEqual(self.stats(CountersTests.follower).posts_count, 0)
@@ -0,0 +1,91 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.feeds import FEED_ITEMS
+from posts.models import Group, Post, User
+
+
+class FeedsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Loly')
+        cls.other = User.objects.create_user(username='Other')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug', description='Описание'
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.user, group=cls.group, text=f'Пост {number}')
+            for number in range(FEED_ITEMS + 5)
+        )
+        Post.objects.create(author=cls.other, text='Пост без группы')
+
+    def setUp(self):
+        self.guest_client = Client()
+        cache.clear()
+
+    def test_feeds_contain_last_posts(self):
+        feeds = {
+            reverse('posts:rss'): ('<item>', FEED_ITEMS),
+            reverse('posts:atom'): ('<entry>', FEED_ITEMS),
+            reverse('posts:group_rss', kwargs={'slug': 'test-slug'}): (
+                '<item>', FEED_ITEMS
+            ),
+            reverse('posts:group_atom', kwargs={'slug': 'test-slug'}): (
+                '<entry>', FEED_ITEMS
+            ),
+            reverse('posts:profile_rss', kwargs={'username': 'Other'}): (
+                '<item>', 1
+            ),
+            reverse('posts:profile_atom', kwargs={'username': 'Other'}): (
+                '<entry>', 1
+            ),
+        }
+        for url, (tag, count) in feeds.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.content.decode().count(tag), count)
+        response = self.guest_client.get(reverse('posts:rss'))
+        self.assertIn('Пост без группы', response.content.decode())
+
+    def test_missing_objects(self):
+        urls = (
+            reverse('posts:group_rss', kwargs={'slug': 'missing'}),
+            reverse('posts:profile_atom', kwargs={'username': 'missing'}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, 404)
+
+    def test_feed_is_cached_and_conditional(self):
+        url = reverse('posts:group_rss', kwargs={'slug': 'test-slug'})
+        etag = self.guest_client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Post.objects.create(
+            author=self.user, group=self.group, text='Свежий пост'
+        )
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Свежий пост', response.content.decode())
+
+    def test_pages_link_to_feeds(self):
+        pages = {
+            reverse('posts:main'): reverse('posts:rss'),
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}): (
+                reverse('posts:group_rss', kwargs={'slug': 'test-slug'})
+            ),
+            reverse('posts:profile', kwargs={'username': 'Loly'}): (
+                reverse('posts:profile_rss', kwargs={'username': 'Loly'})
+            ),
+        }
+        for page, feed in pages.items():
+            with self.subTest(page=page):
+                self.assertContains(self.guest_client.get(page), feed)
@@ -0,0 +1,78 @@
+from unittest import mock
+
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+
+from posts import follows
+from posts.models import Follow, Post, TimelineEntry, User, UserStats
+
+
+class FollowsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Reader')
+        cls.authors = [
+            User.objects.create_user(username=f'Author{number}')
+            for number in range(3)
+        ]
+        for author in cls.authors:
+            Post.objects.create(author=author, text='Тестовый пост')
+
+    def stats(self, user):
+        return UserStats.objects.get(user=user)
+
+    def test_follow_is_idempotent(self):
+        author = FollowsTests.authors[0]
+        self.assertTrue(follows.follow(FollowsTests.user, author))
+        self.assertFalse(follows.follow(FollowsTests.user, author))
+        self.assertEqual(
+            Follow.objects.filter(user=FollowsTests.user).count(), 1
+        )
+        self.assertEqual(self.stats(author).followers_count, 1)
+
+    def test_self_follow_is_rejected(self):
+        self.assertFalse(follows.follow(FollowsTests.user, FollowsTests.user))
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Follow.objects.create(
+                user=FollowsTests.user, author=FollowsTests.user
+            )
+
+    def test_duplicate_follow_is_rejected_by_database(self):
+        author = FollowsTests.authors[0]
+        Follow.objects.create(user=FollowsTests.user, author=author)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Follow.objects.create(user=FollowsTests.user, author=author)
+
+    def test_follow_many_and_unfollow_many(self):
+        user = FollowsTests.user
+        follows.follow(user, FollowsTests.authors[0])
+        created = follows.follow_many(user, FollowsTests.authors + [user])
+        self.assertEqual(created, 2)
+        self.assertEqual(Follow.objects.filter(user=user).count(), 3)
+        self.assertEqual(self.stats(user).following_count, 3)
+        for author in FollowsTests.authors:
+            self.assertEqual(self.stats(author).followers_count, 1)
+        self.assertEqual(TimelineEntry.objects.filter(user=user).count(), 3)
+
+        deleted = follows.unfollow_many(user, FollowsTests.authors[:2])
+        self.assertEqual(deleted, 2)
+        self.assertEqual(self.stats(user).following_count, 1)
+        self.assertEqual(
+            self.stats(FollowsTests.authors[0]).followers_count, 0
+        )
+        self.assertEqual(TimelineEntry.objects.filter(user=user).count(), 1)
+
+    def test_unfollow_many_skips_per_row_signals(self):
+        user = FollowsTests.user
+        follows.follow_many(user, FollowsTests.authors)
+        with mock.patch('posts.signals.counters.bump_user') as bump_user:
+            deleted = follows.unfollow_many(
+                user, User.objects.filter(username__startswith='Author')
+            )
+        bump_user.assert_not_called()
+        self.assertEqual(deleted, 3)
+        self.assertFalse(Follow.objects.filter(user=user).exists())
+        self.assertEqual(self.stats(user).following_count, 0)
+        self.assertFalse(TimelineEntry.objects.filter(user=user).exists())
+        self.assertEqual(follows.unfollow_many(user, FollowsTests.authors), 0)
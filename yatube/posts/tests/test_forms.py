@@ -1,15 +1,19 @@
 import shutil
 import tempfile
+from io import BytesIO
 
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from PIL import Image, PngImagePlugin
 
 from posts.forms import PostForm
 from posts.models import Comment, Group, Post, User
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+ORIENTATION_TAG = 0x0112
+MAKE_TAG = 0x010F
 
 
 @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
@@ -125,3 +129,69 @@ class PostFormTests(TestCase):
         self.assertEqual(Comment.objects.count(), comment_count + 1)
         self.assertEqual(last_obj.author.username, expected_author)
         self.assertEqual(last_obj.text, expected_text)
+
+
+class PostImageUploadTests(TestCase):
+    @staticmethod
+    def jpeg_upload(size, orientation=None):
+        image = Image.new('RGB', size, color=(200, 10, 10))
+        exif = Image.Exif()
+        if orientation:
+            exif[ORIENTATION_TAG] = orientation
+        buffer = BytesIO()
+        image.save(buffer, 'JPEG', exif=exif.tobytes())
+        return SimpleUploadedFile(
+            name='photo.jpg',
+            content=buffer.getvalue(),
+            content_type='image/jpeg',
+        )
+
+    @staticmethod
+    def png_upload(size):
+        image = Image.new('RGBA', size, color=(200, 10, 10, 128))
+        exif = Image.Exif()
+        exif[MAKE_TAG] = 'Camera'
+        exif[ORIENTATION_TAG] = 6
+        info = PngImagePlugin.PngInfo()
+        info.add_text('Comment', 'Секрет')
+        buffer = BytesIO()
+        image.save(buffer, 'PNG', exif=exif.tobytes(), pnginfo=info)
+        return SimpleUploadedFile(
+            name='picture.png',
+            content=buffer.getvalue(),
+            content_type='image/png',
+        )
+
+    @override_settings(POST_IMAGE_MAX_SIDE=300)
+    def test_png_upload_is_stripped(self):
+        form = PostForm(
+            data={'text': 'Тестовый пост'},
+            files={'image': self.png_upload((600, 300))},
+        )
+        self.assertTrue(form.is_valid(), form.errors)
+        image = Image.open(form.cleaned_data['image'])
+        self.assertEqual(image.format, 'PNG')
+        self.assertEqual(image.size, (150, 300))
+        self.assertEqual(dict(image.getexif()), {})
+        self.assertNotIn('exif', image.info)
+        self.assertNotIn('Comment', image.info)
+
+    @override_settings(POST_IMAGE_MAX_SIDE=300)
+    def test_upload_is_reduced_rotated_and_stripped(self):
+        form = PostForm(
+            data={'text': 'Тестовый пост'},
+            files={'image': self.jpeg_upload((600, 300), orientation=6)},
+        )
+        self.assertTrue(form.is_valid(), form.errors)
+        image = Image.open(form.cleaned_data['image'])
+        self.assertEqual(image.size, (150, 300))
+        self.assertNotIn(ORIENTATION_TAG, image.getexif())
+
+    @override_settings(POST_IMAGE_MAX_PIXELS=100)
+    def test_decompression_bomb_is_rejected(self):
+        form = PostForm(
+            data={'text': 'Тестовый пост'},
+            files={'image': self.jpeg_upload((20, 20))},
+        )
+        self.assertFalse(form.is_valid())
+        self.assertIn('image', form.errors)
@@ -0,0 +1,116 @@
+import json
+import os
+import tempfile
+from datetime import datetime
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from posts import search
+from posts.models import (
+    Comment, Follow, Group, Post, TimelineEntry, User, UserStats,
+)
+
+
+class ImportContentTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Loly')
+        cls.follower = User.objects.create_user(username='Follower')
+        Follow.objects.create(user=cls.follower, author=cls.author)
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        return path
+
+    def run_import(self, path, **options):
+        out, err = StringIO(), StringIO()
+        call_command(
+            'import_content', path, stdout=out, stderr=err, **options
+        )
+        return out.getvalue(), err.getvalue()
+
+    def test_import_posts_jsonl(self):
+        rows = [
+            {
+                'author': 'Loly',
+                'group': 'test-slug',
+                'text': f'Импортированный пост {number}',
+                'pub_date': f'2020-01-0{number + 1}T10:00:00',
+            }
+            for number in range(5)
+        ]
+        rows.append({'author': 'Nobody', 'text': 'Чужой пост'})
+        rows.append({
+            'author': 'Loly', 'text': 'Пост', 'pub_date': '2020-13-45 00:00'
+        })
+        rows.append({'author': 'Loly', 'text': ''})
+        content = '\n'.join(json.dumps(row) for row in rows)
+        path = self.write('posts.jsonl', content + '\n{broken\n')
+        out, err = self.run_import(path, batch_size=2)
+
+        self.assertIn('Импортировано: 5', out)
+        self.assertIn('пропущено строк с ошибками: 4', out)
+        self.assertIn('Неверная дата: 2020-13-45 00:00', err)
+        self.assertIn('Nobody', err)
+        posts = Post.objects.filter(group=ImportContentTests.group)
+        self.assertEqual(posts.count(), 5)
+        self.assertEqual(
+            posts.order_by('pub_date').first().pub_date,
+            timezone.make_aware(datetime(2020, 1, 1, 10)),
+        )
+        self.assertEqual(
+            UserStats.objects.get(user=ImportContentTests.author).posts_count,
+            5,
+        )
+        self.assertEqual(
+            TimelineEntry.objects.filter(
+                user=ImportContentTests.follower
+            ).count(),
+            5,
+        )
+        self.assertEqual(
+            len(search.match('импортированный', limit=None)), 5
+        )
+
+    def test_import_comments_csv(self):
+        post = Post.objects.create(
+            author=ImportContentTests.author, text='Тестовый пост'
+        )
+        path = self.write(
+            'comments.csv',
+            'post,author,text,created\n'
+            f'{post.pk},Follower,Первый,2020-01-01T10:00:00\n'
+            f'{post.pk},Loly,Второй,\n'
+            f'{post.pk + 100},Loly,Потерянный,\n',
+        )
+        out, err = self.run_import(path, kind='comments')
+        self.assertIn('Импортировано: 2', out)
+        self.assertIn(f'нет поста {post.pk + 100}', err)
+        self.assertEqual(Comment.objects.filter(post=post).count(), 2)
+        self.assertEqual(
+            Comment.objects.get(text='Первый').created,
+            timezone.make_aware(datetime(2020, 1, 1, 10)),
+        )
+        self.assertGreater(
+            Comment.objects.get(text='Второй').created,
+            timezone.make_aware(datetime(2020, 1, 1, 10)),
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 2)
@@ -0,0 +1,111 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import search
+from posts.models import Group, Post, User
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Loly')
+        cls.other = User.objects.create_user(username='Other')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.best = Post.objects.create(
+            author=cls.author,
+            group=cls.group,
+            text='Кофе, кофе и ещё раз кофе',
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.other,
+                text=f'Утренний кофе номер {i} и длинный текст про погоду',
+            )
+            for i in range(12)
+        ]
+        Post.objects.create(author=cls.author, text='Чай без сахара')
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def search(self, **params):
+        return self.guest_client.get(reverse('posts:search'), params)
+
+    def test_search_ranks_and_pages(self):
+        """Самый релевантный пост первый, страницы идут по курсору."""
+        response = self.search(q='кофе')
+        first_page = response.context['posts']
+        self.assertEqual(len(first_page), 10)
+        self.assertEqual(first_page[0], SearchTests.best)
+        next_query = response.context['next_query']
+        self.assertIsNotNone(next_query)
+        response = self.guest_client.get(
+            reverse('posts:search') + '?' + next_query
+        )
+        second_page = response.context['posts']
+        self.assertEqual(len(second_page), 3)
+        self.assertIsNone(response.context['next_query'])
+        self.assertEqual(
+            {post.pk for post in first_page + second_page},
+            {SearchTests.best.pk} | {post.pk for post in SearchTests.posts},
+        )
+
+    def test_search_filters(self):
+        """Поиск учитывает группу и автора."""
+        self.assertEqual(
+            self.search(q='кофе', group='test-slug').context['posts'],
+            [SearchTests.best],
+        )
+        self.assertEqual(
+            len(self.search(q='кофе', author='Other').context['posts']), 10
+        )
+
+    def test_search_prefix_and_operators(self):
+        """Слова ищутся по префиксу, операторы FTS5 не ломают запрос."""
+        self.assertEqual(
+            self.search(q='сах').context['posts'][0].text, 'Чай без сахара'
+        )
+        response = self.search(q='"кофе" OR NEAR(')
+        self.assertEqual(response.status_code, 200)
+
+    def test_index_follows_post_changes(self):
+        post = Post.objects.get(pk=SearchTests.posts[0].pk)
+        post.text = 'Совсем другая тема'
+        post.save()
+        self.assertEqual(self.search(q='тема').context['posts'], [post])
+        post.delete()
+        self.assertEqual(self.search(q='тема').context['posts'], [])
+
+    def test_rebuild_command(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {search.FTS_TABLE}')
+        self.assertEqual(self.search(q='чай').context['posts'], [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(len(self.search(q='чай').context['posts']), 1)
+
+    def test_admin_search_uses_index_subquery(self):
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='admin'
+        )
+        client = Client()
+        client.force_login(admin)
+        url = reverse('admin:posts_post_changelist')
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url, {'q': 'кофе'})
+        self.assertEqual(response.context['cl'].result_count, 13)
+        self.assertTrue(any(
+            f'IN (SELECT rowid FROM {search.FTS_TABLE}' in query['sql']
+            for query in queries.captured_queries
+        ))
+        response = client.get(url, {'q': '!!!'})
+        self.assertEqual(response.context['cl'].result_count, 0)
@@ -0,0 +1,104 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts import thumbnails
+from posts.models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        small_gif = (
+            b'\x47\x49\x46\x38\x39\x61\x02\x00'
+            b'\x01\x00\x80\x00\x00\x00\x00\x00'
+            b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+            b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+            b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+            b'\x0A\x00\x3B'
+        )
+        cls.user = User.objects.create_user(username='Loly')
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Тестовый пост',
+            image=SimpleUploadedFile(
+                name='small.gif',
+                content=small_gif,
+                content_type='image/gif',
+            ),
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    @override_settings(THUMBNAIL_WORKERS=2)
+    def test_placeholder_until_thumbnail_is_ready(self):
+        url = reverse(
+            'posts:post_detail', kwargs={'post_id': ThumbnailTests.post.pk}
+        )
+        self.assertIsNone(
+            thumbnails.cached_thumbnail(ThumbnailTests.post.image)
+        )
+        self.assertContains(self.client.get(url), 'img/placeholder.svg')
+
+        thumbnail = thumbnails.generate(ThumbnailTests.post.image.name)
+        self.assertEqual(
+            thumbnails.cached_thumbnail(ThumbnailTests.post.image).name,
+            thumbnail.name,
+        )
+        response = self.client.get(url)
+        self.assertNotContains(response, 'img/placeholder.svg')
+        self.assertContains(response, thumbnail.url)
+
+    @override_settings(THUMBNAIL_WORKERS=0)
+    def test_synchronous_mode(self):
+        thumbnail = thumbnails.post_thumbnail(ThumbnailTests.post.image)
+        self.assertIsNotNone(thumbnail)
+        self.assertEqual(thumbnail.width, 960)
+
+    def test_prefetch_reads_page_in_one_batch(self):
+        posts = [
+            Post.objects.create(
+                author=ThumbnailTests.user,
+                text=f'Пост {i}',
+                image=ThumbnailTests.post.image.name,
+            )
+            for i in range(3)
+        ]
+        thumbnail = thumbnails.generate(ThumbnailTests.post.image.name)
+        cache.clear()
+        with self.assertNumQueries(1):
+            thumbnails.prefetch(posts)
+        with self.assertNumQueries(0):
+            for post in posts:
+                self.assertEqual(
+                    thumbnails.post_thumbnail(post.image).name,
+                    thumbnail.name,
+                )
+
+    def test_unknown_sorl_version_uses_public_api(self):
+        """С непроверенной версией sorl миниатюра берётся get_thumbnail."""
+        with mock.patch.object(
+            thumbnails.sorl, '__version__', '99.0.0'
+        ), mock.patch.object(thumbnails, 'thumbnail_file') as thumbnail_file:
+            thumbnails.prefetch([ThumbnailTests.post])
+            thumbnail = thumbnails.cached_thumbnail(
+                ThumbnailTests.post.image
+            )
+        thumbnail_file.assert_not_called()
+        self.assertEqual(thumbnail.width, 960)
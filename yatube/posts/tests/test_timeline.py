@@ -0,0 +1,129 @@
+from importlib import import_module
+from io import StringIO
+from types import SimpleNamespace
+
+from django.apps import apps
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Follow, Post, TimelineEntry, User
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Loly')
+        cls.follower = User.objects.create_user(username='Follower')
+        cls.old_post = Post.objects.create(
+            author=cls.author,
+            text='Старый пост',
+        )
+
+    def timeline_posts(self):
+        return list(
+            TimelineEntry.objects.filter(user=TimelineTests.follower)
+            .order_by('-pub_date', '-post_id')
+            .values_list('post_id', flat=True)
+        )
+
+    def test_follow_backfills_and_unfollow_removes(self):
+        follow = Follow.objects.create(
+            user=TimelineTests.follower, author=TimelineTests.author
+        )
+        self.assertEqual(self.timeline_posts(), [TimelineTests.old_post.pk])
+        follow.delete()
+        self.assertEqual(self.timeline_posts(), [])
+
+    def test_new_post_fans_out_to_followers(self):
+        Follow.objects.create(
+            user=TimelineTests.follower, author=TimelineTests.author
+        )
+        post = Post.objects.create(
+            author=TimelineTests.author, text='Новый пост'
+        )
+        self.assertEqual(
+            self.timeline_posts(), [post.pk, TimelineTests.old_post.pk]
+        )
+
+    @override_settings(TIMELINE_MAX_ENTRIES=2)
+    def test_timeline_is_capped(self):
+        Follow.objects.create(
+            user=TimelineTests.follower, author=TimelineTests.author
+        )
+        posts = [
+            Post.objects.create(
+                author=TimelineTests.author, text=f'Пост {i}'
+            )
+            for i in range(3)
+        ]
+        self.assertEqual(
+            self.timeline_posts(), [posts[2].pk, posts[1].pk]
+        )
+
+    def test_rebuild_command(self):
+        Follow.objects.create(
+            user=TimelineTests.follower, author=TimelineTests.author
+        )
+        TimelineEntry.objects.all().delete()
+        call_command('rebuild_timelines', stdout=StringIO())
+        self.assertEqual(self.timeline_posts(), [TimelineTests.old_post.pk])
+
+    @override_settings(TIMELINE_MAX_ENTRIES=1)
+    def test_trim_is_one_statement(self):
+        followers = [
+            User.objects.create_user(username=f'Reader{i}') for i in range(3)
+        ]
+        for follower in followers:
+            Follow.objects.create(user=follower, author=TimelineTests.author)
+        with CaptureQueriesContext(connection) as context:
+            post = Post.objects.create(
+                author=TimelineTests.author, text='Новый пост'
+            )
+        deletes = [
+            query for query in context.captured_queries
+            if query['sql'].startswith('DELETE FROM posts_timelineentry')
+        ]
+        self.assertEqual(len(deletes), 1)
+        for follower in followers:
+            self.assertEqual(
+                list(follower.timeline.values_list('post_id', flat=True)),
+                [post.pk],
+            )
+
+    def test_follow_page_orders_by_timeline_date(self):
+        Follow.objects.create(
+            user=TimelineTests.follower, author=TimelineTests.author
+        )
+        new_post = Post.objects.create(
+            author=TimelineTests.author, text='Новый пост'
+        )
+        TimelineEntry.objects.filter(post=new_post).update(
+            pub_date=TimelineTests.old_post.pub_date.replace(year=2000)
+        )
+        self.client.force_login(TimelineTests.follower)
+        page_obj = self.client.get(
+            reverse('posts:follow_index')
+        ).context['page_obj']
+        self.assertEqual(
+            [post.pk for post in page_obj],
+            [TimelineTests.old_post.pk, new_post.pk],
+        )
+
+    @override_settings(TIMELINE_MAX_ENTRIES=2)
+    def test_migration_backfills_existing_follows(self):
+        migration = import_module('posts.migrations.0015_timelineentry')
+        newer = Post.objects.create(author=TimelineTests.author, text='Новый')
+        newest = Post.objects.create(
+            author=TimelineTests.author, text='Новейший'
+        )
+        Follow.objects.create(
+            user=TimelineTests.follower, author=TimelineTests.author
+        )
+        TimelineEntry.objects.all().delete()
+        schema_editor = SimpleNamespace(connection=connection)
+        migration.backfill_timelines(apps, schema_editor)
+        self.assertEqual(self.timeline_posts(), [newest.pk, newer.pk])
@@ -0,0 +1,119 @@
+import math
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import trending
+from posts.models import Comment, Post, TrendingPost, TrendingState, User
+
+
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Loly')
+        cls.busy = Post.objects.create(author=cls.user, text='Старый спор')
+        cls.fresh = Post.objects.create(author=cls.user, text='Свежий спор')
+        cls.quiet = Post.objects.create(author=cls.user, text='Тишина')
+
+    def setUp(self):
+        self.guest_client = Client()
+        cache.clear()
+
+    def comment(self, post, age):
+        comment = Comment.objects.create(
+            post=post, author=self.user, text='Комментарий'
+        )
+        Comment.objects.filter(pk=comment.pk).update(
+            created=timezone.now() - age
+        )
+
+    def scores(self):
+        return dict(TrendingPost.objects.values_list('post_id', 'score'))
+
+    def test_recent_activity_ranks_higher(self):
+        for _ in range(3):
+            self.comment(self.busy, timedelta(days=3))
+        for _ in range(2):
+            self.comment(self.fresh, timedelta(hours=1))
+        self.assertEqual(trending.update(), 5)
+        self.assertEqual(
+            list(TrendingPost.objects.values_list('post_id', flat=True)),
+            [self.fresh.pk, self.busy.pk],
+        )
+        busy = TrendingPost.objects.get(post=self.busy)
+        self.assertEqual(busy.comments_count, 3)
+        now = trending.log_weight(timezone.now())
+        self.assertAlmostEqual(math.exp(busy.score - now), 3 / 8, places=3)
+
+    def test_update_is_incremental(self):
+        self.comment(self.busy, timedelta(hours=5))
+        trending.update()
+        self.comment(self.busy, timedelta(hours=1))
+        self.comment(self.quiet, timedelta(minutes=1))
+        self.assertEqual(trending.update(), 2)
+        self.assertEqual(trending.update(), 0)
+        incremental = self.scores()
+        self.assertEqual(
+            TrendingState.objects.get().last_comment_id,
+            Comment.objects.latest('pk').pk,
+        )
+        call_command('update_trending', '--rebuild', stdout=StringIO())
+        for post_id, score in self.scores().items():
+            with self.subTest(post_id=post_id):
+                self.assertAlmostEqual(incremental[post_id], score)
+
+    def test_concurrent_update_counts_comments_once(self):
+        """Запуск, который опередил другой процесс, ничего не пишет."""
+        self.comment(self.busy, timedelta(hours=1))
+        new_scores = trending.new_scores
+
+        def race(*args):
+            scores = new_scores(*args)
+            TrendingState.objects.update(
+                last_comment_id=Comment.objects.latest('pk').pk
+            )
+            return scores
+
+        with mock.patch.object(trending, 'new_scores', side_effect=race):
+            self.assertEqual(trending.update(), 0)
+        self.assertFalse(TrendingPost.objects.exists())
+
+    def test_post_changes_refresh_trending_page(self):
+        self.comment(self.quiet, timedelta(minutes=1))
+        trending.update()
+        url = reverse('posts:trending')
+        self.guest_client.get(url)
+        post = Post.objects.get(pk=self.quiet.pk)
+        post.text = 'Новый текст'
+        post.save()
+        self.assertContains(self.guest_client.get(url), 'Новый текст')
+        post.delete()
+        self.assertEqual(self.guest_client.get(url).context['posts'], [])
+
+    def test_old_posts_leave_ranking(self):
+        self.comment(self.busy, timedelta(hours=1))
+        trending.update()
+        Post.objects.filter(pk=self.busy.pk).update(
+            pub_date=timezone.now() - timedelta(days=30)
+        )
+        trending.update()
+        self.assertFalse(TrendingPost.objects.exists())
+
+    def test_trending_page(self):
+        self.comment(self.quiet, timedelta(minutes=1))
+        trending.update()
+        with self.assertNumQueries(1):
+            response = self.guest_client.get(reverse('posts:trending'))
+        self.assertEqual(response.context['posts'], [self.quiet])
+        self.comment(self.fresh, timedelta(minutes=1))
+        self.comment(self.fresh, timedelta(minutes=1))
+        trending.update()
+        response = self.guest_client.get(reverse('posts:trending'))
+        self.assertEqual(response.context['posts'], [self.fresh, self.quiet])
@@ -1,10 +1,15 @@
 from django import forms
 from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import Client, TestCase
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from posts.models import Follow, Group, Post, User
+from core.queries import assert_no_query_issues
+from posts import thumbnails
+from posts.models import Comment, Follow, Group, Post, TimelineEntry, User
 
 FIRST_COUNT_PAGE_OBJ = 10
 SECOND_COUNT_PAGE_OBJ = 3
@@ -187,17 +192,67 @@ class PostPagesTests(TestCase):
         )
         self.assertEqual(new_post.text, response.context['page_obj'][0].text)
         response_content = response.content
-        new_post.delete()
         response_cached_content = (
             self.authorized_client.get(reverse('posts:main')).content
         )
-        cache.clear()
+        new_post.delete()
         response_deleted_content = (
             self.authorized_client.get(reverse('posts:main')).content
         )
         self.assertEqual(response_content, response_cached_content)
         self.assertNotEqual(response_cached_content, response_deleted_content)
 
+    def post_card_key(self, post):
+        thumbnail = thumbnails.cached_thumbnail(post.image)
+        return make_template_fragment_key('post_card', [
+            post.pk,
+            post.updated.isoformat(),
+            thumbnail.name if thumbnail else '',
+        ])
+
+    def test_post_card_fragment_cache(self):
+        """Карточка поста кешируется и обновляется после правки."""
+        post = Post.objects.get(pk=PostPagesTests.post.pk)
+        self.client.get(reverse('posts:main'))
+        key = self.post_card_key(post)
+        self.assertIn('Тестовый пост', cache.get(key))
+
+        post.text = 'Исправленный пост'
+        post.save()
+        response = self.client.get(reverse('posts:main'))
+        self.assertContains(response, 'Исправленный пост')
+        key = self.post_card_key(post)
+        self.assertIn('Исправленный пост', cache.get(key))
+
+    def test_feed_cache_is_invalidated_by_writes(self):
+        """Новый пост сразу виден во всех закешированных лентах."""
+        follower = User.objects.create_user(username='Follower')
+        Follow.objects.create(user=follower, author=PostPagesTests.user)
+        follower_client = Client()
+        follower_client.force_login(follower)
+        pages = (
+            (self.client, reverse('posts:main')),
+            (self.client, reverse(
+                'posts:group_list', kwargs={'slug': 'test-slug'}
+            )),
+            (self.client, reverse(
+                'posts:profile', kwargs={'username': 'Loly'}
+            )),
+            (follower_client, reverse('posts:follow_index')),
+        )
+        for client, url in pages:
+            client.get(url)
+        new_post = Post.objects.create(
+            author=PostPagesTests.user,
+            group=PostPagesTests.group,
+            text='Свежий пост',
+        )
+        for client, url in pages:
+            with self.subTest(url=url):
+                response = client.get(url)
+                self.assertEqual(response.context['page_obj'][0], new_post)
+                self.assertEqual(client.get(url).content, response.content)
+
 
 class PaginatorViewsTest(TestCase):
     @classmethod
@@ -274,6 +329,73 @@ class PaginatorViewsTest(TestCase):
             len(response.context['page_obj']), SECOND_COUNT_PAGE_OBJ
         )
 
+    def test_cursor_pages(self):
+        """Курсоры ведут на следующую и обратно на первую страницу."""
+        url = reverse('posts:group_list', kwargs={'slug': 'test-slug'})
+        first_page = self.client.get(url).context['page_obj']
+        self.assertIsNotNone(first_page.next_cursor)
+
+        second_page = self.client.get(
+            url + f'?cursor={first_page.next_cursor}'
+        ).context['page_obj']
+        self.assertTrue(second_page.is_cursor)
+        self.assertEqual(len(second_page), SECOND_COUNT_PAGE_OBJ)
+        self.assertFalse(second_page.has_next())
+        self.assertEqual(
+            list(second_page),
+            list(first_page.paginator.page(2).object_list),
+        )
+
+        previous_page = self.client.get(
+            url + f'?cursor={second_page.previous_cursor}'
+        ).context['page_obj']
+        self.assertEqual(list(previous_page), list(first_page))
+        self.assertFalse(previous_page.has_previous())
+
+    def test_cursor_page_has_no_count_query(self):
+        url = reverse('posts:main')
+        first_page = self.client.get(url).context['page_obj']
+        paginator = first_page.paginator
+        with self.assertNumQueries(1):
+            page = paginator.get_cursor_page(first_page.next_cursor)
+            list(page)
+
+    def test_pagination_links_use_cursors(self):
+        """Первая страница и старые ссылки ?page= ведут на курсоры."""
+        url = reverse('posts:main')
+        first_page = self.client.get(url)
+        self.assertContains(
+            first_page,
+            f'href="?cursor={first_page.context["page_obj"].next_cursor}"',
+        )
+        self.assertNotContains(first_page, 'href="?page=')
+        old_link = self.client.get(url + '?page=2')
+        self.assertContains(
+            old_link,
+            f'href="?cursor={old_link.context["page_obj"].previous_cursor}"',
+        )
+        self.assertNotContains(old_link, 'href="?page=')
+        back = self.client.get(
+            url + f'?cursor={old_link.context["page_obj"].previous_cursor}'
+        )
+        self.assertEqual(
+            list(back.context['page_obj']),
+            list(first_page.context['page_obj']),
+        )
+        second_page = self.client.get(
+            url + f'?cursor={first_page.context["page_obj"].next_cursor}'
+        )
+        self.assertNotContains(second_page, 'href="?page=')
+        page_obj = second_page.context['page_obj']
+        self.assertIsNone(page_obj.next_page_number())
+        self.assertIsNone(page_obj.previous_page_number())
+        self.assertIsNone(page_obj.start_index())
+
+    def test_broken_cursor_returns_first_page(self):
+        response = self.client.get(reverse('posts:main') + '?cursor=abc')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['page_obj'].number, 1)
+
 
 class FollowViewTests(TestCase):
     @classmethod
@@ -340,3 +462,180 @@ class FollowViewTests(TestCase):
             'posts:profile', kwargs={
                 'username': FollowViewTests.author
             }))
+
+
+class QueryCountViewTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Loly')
+        cls.commentator = User.objects.create_user(username='Commentator')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Follow.objects.create(user=cls.commentator, author=cls.user)
+        cls.post = Post.objects.create(
+            author=cls.user,
+            group=cls.group,
+            text='Тестовый пост',
+        )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(QueryCountViewTests.commentator)
+        cache.clear()
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            self.authorized_client.get(url)
+        return len(context)
+
+    def add_posts_and_comments(self):
+        for i in range(5):
+            post = Post.objects.create(
+                author=QueryCountViewTests.user,
+                group=QueryCountViewTests.group,
+                text=f'Тестовый пост {i}',
+            )
+            Comment.objects.create(
+                post=QueryCountViewTests.post,
+                author=QueryCountViewTests.commentator,
+                text=f'Комментарий {post.pk}',
+            )
+
+    def test_query_count_does_not_depend_on_posts(self):
+        """Число запросов не растёт вместе с числом постов на странице."""
+        urls = (
+            reverse('posts:main'),
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'Loly'}),
+            reverse('posts:follow_index'),
+            reverse(
+                'posts:post_detail',
+                kwargs={'post_id': QueryCountViewTests.post.pk},
+            ),
+        )
+        before = {url: self.count_queries(url) for url in urls}
+        self.add_posts_and_comments()
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.count_queries(url), before[url])
+
+
+@override_settings(FOLLOW_FEED_ENGINE='merge')
+class MergeFeedViewTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.follower = User.objects.create_user(username='Follower')
+        cls.authors = [
+            User.objects.create_user(username=f'Author{i}')
+            for i in range(3)
+        ]
+        for author in cls.authors[:2]:
+            Follow.objects.create(user=cls.follower, author=author)
+        for i in range(18):
+            Post.objects.create(
+                author=cls.authors[i % 3],
+                text=f'Тестовый пост {i}',
+            )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(MergeFeedViewTests.follower)
+        cache.clear()
+
+    def test_merge_feed_matches_join_order(self):
+        """Слияние лент авторов даёт тот же порядок, что и JOIN."""
+        expected = list(
+            Post.objects.filter(
+                author__following__user=MergeFeedViewTests.follower
+            ).order_by('-pub_date', '-pk')
+        )
+        url = reverse('posts:follow_index')
+        first_page = self.authorized_client.get(url).context['page_obj']
+        self.assertEqual(len(first_page), FIRST_COUNT_PAGE_OBJ)
+        self.assertFalse(first_page.has_previous())
+        second_page = self.authorized_client.get(
+            url + f'?cursor={first_page.next_cursor}'
+        ).context['page_obj']
+        self.assertFalse(second_page.has_next())
+        self.assertEqual(list(first_page) + list(second_page), expected)
+
+        previous_page = self.authorized_client.get(
+            url + f'?cursor={second_page.previous_cursor}'
+        ).context['page_obj']
+        self.assertEqual(list(previous_page), list(first_page))
+
+    def test_merge_feed_has_no_per_author_queries(self):
+        for i in range(8):
+            author = User.objects.create_user(username=f'Many{i}')
+            Follow.objects.create(
+                user=MergeFeedViewTests.follower, author=author
+            )
+            Post.objects.create(author=author, text=f'Пост автора {i}')
+        with assert_no_query_issues():
+            response = self.authorized_client.get(
+                reverse('posts:follow_index')
+            )
+        self.assertEqual(len(response.context['page_obj']), 10)
+
+    def test_merge_engine_does_not_fan_out(self):
+        self.assertFalse(TimelineEntry.objects.exists())
+
+
+class CommentPaginationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Loly')
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост')
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.user, text=f'Комментарий {i}')
+            for i in range(25)
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def test_comments_are_paginated_by_cursor(self):
+        """Комментарии идут по порядку и догружаются по курсору."""
+        expected = list(CommentPaginationTests.post.comments.all())
+        response = self.guest_client.get(
+            reverse(
+                'posts:post_detail',
+                kwargs={'post_id': CommentPaginationTests.post.pk},
+            )
+        )
+        first_page = response.context['comments']
+        self.assertEqual(len(first_page), 20)
+        self.assertTrue(first_page.has_next())
+        response = self.guest_client.get(
+            reverse(
+                'posts:post_comments',
+                kwargs={'post_id': CommentPaginationTests.post.pk},
+            ),
+            {'cursor': first_page.next_cursor},
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+        )
+        self.assertTemplateUsed(
+            response, 'posts/includes/comment_list.html'
+        )
+        self.assertTemplateNotUsed(response, 'base.html')
+        second_page = response.context['comments']
+        self.assertFalse(second_page.has_next())
+        self.assertEqual(list(first_page) + list(second_page), expected)
+
+    def test_post_delete_removes_comments(self):
+        """Комментарии удаляются вместе с постом."""
+        post = Post.objects.create(
+            author=CommentPaginationTests.user, text='Другой пост'
+        )
+        Comment.objects.create(
+            post=post, author=CommentPaginationTests.user, text='Текст'
+        )
+        post.delete()
+        self.assertFalse(Comment.objects.filter(text='Текст').exists())
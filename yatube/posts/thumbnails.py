@@ -0,0 +1,181 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import sorl
+from django.conf import settings
+from django.db import connection, transaction
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores import cached_db_kvstore
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+logger = logging.getLogger(__name__)
+
+POST_THUMBNAIL_GEOMETRY = '960x339'
+POST_THUMBNAIL_OPTIONS = {'crop': 'center', 'upscale': True}
+# Версии sorl, с которыми проверено имя миниатюры по внутреннему API
+# бэкенда. С другими версиями миниатюра ищется через get_thumbnail
+SORL_NAMING_VERSIONS = ((12, 0), (13, 0))
+
+_executor = None
+_pending = set()
+_lock = threading.Lock()
+
+
+def sorl_version():
+    return tuple(int(part) for part in sorl.__version__.split('.')[:2])
+
+
+def can_name_thumbnails():
+    """Можно ли получить имя миниатюры, не создавая её."""
+    low, high = SORL_NAMING_VERSIONS
+    return low <= sorl_version() < high
+
+
+def thumbnail_file(image):
+    """Файл миниатюры поста с теми же опциями, что у get_thumbnail.
+
+    Имя считается внутренними методами бэкенда sorl, поэтому вызывать
+    функцию можно только при can_name_thumbnails().
+    """
+    backend = default.backend
+    source = ImageFile(image)
+    options = dict(POST_THUMBNAIL_OPTIONS)
+    if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(sorl_settings, attr)
+        if value != getattr(sorl_defaults, attr):
+            options.setdefault(key, value)
+    name = backend._get_thumbnail_filename(
+        source, POST_THUMBNAIL_GEOMETRY, options
+    )
+    return ImageFile(name, default.storage)
+
+
+def cached_thumbnail(image):
+    """Готовая миниатюра из хранилища sorl или None, если её ещё нет.
+
+    Если миниатюра уже прочитана prefetch(), хранилище не опрашивается.
+    С непроверенной версией sorl миниатюра создаётся сразу через
+    get_thumbnail.
+    """
+    if not image:
+        return None
+    if hasattr(image, 'prefetched_thumbnail'):
+        return image.prefetched_thumbnail
+    if not can_name_thumbnails():
+        return generate(image.name)
+    return default.kvstore.get(thumbnail_file(image))
+
+
+def get_many_raw(keys):
+    """Читает значения хранилища sorl пачкой.
+
+    Из кеша — одним get_many, из базы — одним запросом для промахов.
+    """
+    kvstore = default.kvstore
+    if not isinstance(kvstore, cached_db_kvstore.KVStore):
+        return {key: kvstore._get_raw(key) for key in keys}
+    values = kvstore.cache.get_many(keys)
+    missing = [key for key in keys if key not in values]
+    if missing:
+        found = dict(
+            KVStoreModel.objects.filter(key__in=missing)
+            .values_list('key', 'value')
+        )
+        found = {
+            key: found.get(key, cached_db_kvstore.EMPTY_VALUE)
+            for key in missing
+        }
+        kvstore.cache.set_many(found, sorl_settings.THUMBNAIL_CACHE_TIMEOUT)
+        values.update(found)
+    return {
+        key: None if value == cached_db_kvstore.EMPTY_VALUE else value
+        for key, value in values.items()
+    }
+
+
+def prefetch(posts):
+    """Заранее читает миниатюры всех картинок страницы одной пачкой."""
+    if not can_name_thumbnails():
+        return
+    images = [post.image for post in posts if post.image]
+    keys = [add_prefix(thumbnail_file(image).key) for image in images]
+    values = get_many_raw(list(set(keys)))
+    for image, key in zip(images, keys):
+        value = values.get(key)
+        image.prefetched_thumbnail = (
+            deserialize_image_file(value) if value else None
+        )
+
+
+def generate(name):
+    """Создаёт миниатюру картинки поста."""
+    try:
+        return get_thumbnail(
+            name, POST_THUMBNAIL_GEOMETRY, **POST_THUMBNAIL_OPTIONS
+        )
+    finally:
+        with _lock:
+            _pending.discard(name)
+
+
+def generate_in_thread(name):
+    """Создаёт миниатюру в потоке пула, ошибки только логируются."""
+    try:
+        generate(name)
+    except Exception:
+        logger.exception('Не удалось создать миниатюру %s', name)
+    finally:
+        connection.close()
+
+
+def get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.THUMBNAIL_WORKERS,
+                thread_name_prefix='thumbnails',
+            )
+        return _executor
+
+
+def schedule(name):
+    """Ставит создание миниатюры в очередь пула воркеров.
+
+    При THUMBNAIL_WORKERS = 0 миниатюра создаётся сразу.
+    """
+    if not name:
+        return
+    if not settings.THUMBNAIL_WORKERS:
+        generate(name)
+        return
+    with _lock:
+        if name in _pending:
+            return
+        _pending.add(name)
+    get_executor().submit(generate_in_thread, name)
+
+
+def post_thumbnail(image):
+    """Миниатюра для шаблона: готовая или None, пока её делает пул.
+
+    Недостающая миниатюра ставится в очередь после коммита текущей
+    транзакции, а при THUMBNAIL_WORKERS = 0 создаётся сразу.
+    """
+    thumbnail = cached_thumbnail(image)
+    if thumbnail is not None or not image:
+        return thumbnail
+    if not settings.THUMBNAIL_WORKERS:
+        return generate(image.name)
+    transaction.on_commit(partial(schedule, image.name))
+    return None
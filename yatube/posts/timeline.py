@@ -0,0 +1,107 @@
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, QuerySet
+
+from .models import Follow, Post, TimelineEntry
+
+
+def enabled():
+    """Ведутся ли материализованные ленты (FOLLOW_FEED_ENGINE)."""
+    return settings.FOLLOW_FEED_ENGINE == 'timeline'
+
+
+def timeline_posts(user):
+    """Посты из материализованной ленты подписок пользователя.
+
+    Порядок задаёт timeline_pub_date — дата из записи ленты, поэтому
+    выборка идёт по индексу (user, -pub_date) ленты.
+    """
+    return Post.objects.feed().filter(timeline_entries__user=user).annotate(
+        timeline_pub_date=F('timeline_entries__pub_date')
+    )
+
+
+def trim(user_ids):
+    """Оставляет в лентах пользователей только последние записи.
+
+    Лишние записи всех лент удаляются одним DELETE с ROW_NUMBER().
+    user_ids — список id или queryset с одним столбцом id.
+    """
+    if isinstance(user_ids, QuerySet):
+        users_sql, params = user_ids.query.sql_with_params()
+    else:
+        params = list(user_ids)
+        if not params:
+            return
+        users_sql = ', '.join(['%s'] * len(params))
+    table = TimelineEntry._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {table} WHERE id IN ('
+            'SELECT id FROM (SELECT id, ROW_NUMBER() OVER ('
+            'PARTITION BY user_id ORDER BY pub_date DESC, post_id DESC'
+            f') AS position FROM {table} WHERE user_id IN ({users_sql})'
+            ') WHERE position > %s)',
+            [*params, settings.TIMELINE_MAX_ENTRIES],
+        )
+
+
+def fan_out(post):
+    """Раскладывает новый пост по лентам подписчиков автора."""
+    followers = Follow.objects.filter(author_id=post.author_id).values(
+        'user_id'
+    )
+    follower_ids = list(followers.values_list('user_id', flat=True))
+    if not follower_ids:
+        return
+    with transaction.atomic():
+        TimelineEntry.objects.bulk_create(
+            (
+                TimelineEntry(
+                    user_id=user_id, post=post, pub_date=post.pub_date
+                )
+                for user_id in follower_ids
+            ),
+            ignore_conflicts=True,
+        )
+        trim(followers)
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту подписчика последние посты автора."""
+    posts = (
+        Post.objects.filter(author_id=author_id)
+        .order_by('-pub_date')
+        .values_list('pk', 'pub_date')
+    )[:settings.TIMELINE_MAX_ENTRIES]
+    with transaction.atomic():
+        TimelineEntry.objects.bulk_create(
+            (
+                TimelineEntry(user_id=user_id, post_id=pk, pub_date=pub_date)
+                for pk, pub_date in posts
+            ),
+            ignore_conflicts=True,
+        )
+        trim((user_id,))
+
+
+def remove(user_id, author_ids):
+    """Убирает из ленты подписчика посты авторов author_ids."""
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id__in=author_ids
+    ).delete()
+
+
+def rebuild(user_id):
+    """Собирает ленту пользователя заново по его подпискам."""
+    posts = (
+        Post.objects.filter(author__following__user_id=user_id)
+        .order_by('-pub_date')
+        .values_list('pk', 'pub_date')
+    )[:settings.TIMELINE_MAX_ENTRIES]
+    with transaction.atomic():
+        TimelineEntry.objects.filter(user_id=user_id).delete()
+        TimelineEntry.objects.bulk_create(
+            TimelineEntry(user_id=user_id, post_id=pk, pub_date=pub_date)
+            for pk, pub_date in posts
+        )
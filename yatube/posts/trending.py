@@ -0,0 +1,102 @@
+import math
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Max
+from django.utils import timezone
+
+from core.db import serialized_write
+
+from . import caching
+from .models import Comment, TrendingPost, TrendingState
+
+# Рейтинг поста хранится как логарифм суммы весов его комментариев
+# exp(λ·(created − EPOCH)). Затухание одинаково для всех постов, поэтому
+# порядок по такой сумме совпадает с порядком по затухшей к текущему
+# моменту, и уже посчитанные строки при новом запуске не пересчитываются
+EPOCH = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+
+def decay_rate():
+    return math.log(2) / settings.TRENDING_HALF_LIFE
+
+
+def log_weight(created):
+    """Логарифм веса комментария, оставленного в момент created."""
+    return decay_rate() * (created - EPOCH).total_seconds()
+
+
+def log_add(first, second):
+    """log(exp(first) + exp(second)) без переполнения."""
+    if first is None:
+        return second
+    high, low = max(first, second), min(first, second)
+    return high + math.log1p(math.exp(low - high))
+
+
+def new_scores(after_id, last_id, cutoff):
+    """Рейтинги по комментариям с id в (after_id, last_id] к свежим постам.
+
+    Возвращает словарь post_id: (логарифм суммы весов, число
+    комментариев).
+    """
+    scores = {}
+    comments = Comment.objects.filter(
+        pk__gt=after_id, pk__lte=last_id, post__pub_date__gte=cutoff
+    ).values_list('post_id', 'created')
+    for post_id, created in comments.iterator():
+        score, count = scores.get(post_id, (None, 0))
+        scores[post_id] = (log_add(score, log_weight(created)), count + 1)
+    return scores
+
+
+def update(now=None):
+    """Учитывает комментарии, оставленные после прошлого запуска.
+
+    Новые комментарии находятся по id, их вес — по времени created.
+    Посты старше TRENDING_WINDOW убираются из рейтинга, так что
+    таблица остаётся маленькой. Отметка последнего учтённого
+    комментария сдвигается сравнением с прочитанной: если другой
+    процесс успел раньше, запуск ничего не меняет. Возвращает число
+    учтённых комментариев.
+    """
+    now = now or timezone.now()
+    cutoff = now - timedelta(seconds=settings.TRENDING_WINDOW)
+    state, _ = TrendingState.objects.get_or_create(pk=1)
+    last_id = Comment.objects.aggregate(last=Max('pk'))['last'] or 0
+    scores = new_scores(state.last_comment_id, last_id, cutoff)
+    with serialized_write():
+        advanced = TrendingState.objects.filter(
+            pk=state.pk, last_comment_id=state.last_comment_id
+        ).update(last_comment_id=last_id, updated=now)
+        if not advanced:
+            return 0
+        existing = TrendingPost.objects.in_bulk(list(scores))
+        created, updated = [], []
+        for post_id, (score, count) in scores.items():
+            entry = existing.get(post_id)
+            if entry is None:
+                created.append(TrendingPost(
+                    post_id=post_id, score=score, comments_count=count
+                ))
+                continue
+            entry.score = log_add(entry.score, score)
+            entry.comments_count += count
+            updated.append(entry)
+        TrendingPost.objects.bulk_create(created, batch_size=500)
+        TrendingPost.objects.bulk_update(
+            updated, ['score', 'comments_count'], batch_size=500
+        )
+        TrendingPost.objects.filter(post__pub_date__lt=cutoff).delete()
+    caching.bump('trending')
+    return sum(count for _, count in scores.values())
+
+
+def rebuild(now=None):
+    """Считает рейтинг заново по всем комментариям к свежим постам."""
+    with serialized_write():
+        TrendingPost.objects.all().delete()
+        TrendingState.objects.update_or_create(
+            pk=1, defaults={'last_comment_id': 0}
+        )
+    return update(now)
@@ -1,18 +1,29 @@
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
 
+from core.db import serialized_write
+
+from . import follows, search, thumbnails, timeline
+from .caching import cache_feed
+from .conditional import (
+    group_state, page_condition, post_detail_state, profile_state,
+)
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post, User
+from .models import Follow, Group, Post, TrendingPost, User
+from .paginators import (
+    CommentPaginator, CursorPaginator, MergeFeedPaginator, TimelinePaginator,
+)
 
 NUMBER_OF_RECORDS = 10
+NUMBER_OF_COMMENTS = 20
+NUMBER_OF_TRENDING = 20
 
 
 # Главная страница
-@cache_page(60 * 20)
+@cache_feed(lambda request: ['global'])
 def index(request):
-    posts = Post.objects.all()
+    posts = Post.objects.feed()
     page_obj = paginator_func(request, posts)
     context = {
         'page_obj': page_obj,
@@ -20,10 +31,24 @@ def index(request):
     return render(request, 'posts/index.html', context)
 
 
+# Популярные посты, рейтинг считает команда update_trending
+@cache_feed(lambda request: ['trending'])
+def trending(request):
+    posts = [
+        entry.post for entry in TrendingPost.objects.select_related(
+            'post__author', 'post__group'
+        )[:NUMBER_OF_TRENDING]
+    ]
+    thumbnails.prefetch(posts)
+    return render(request, 'posts/trending.html', {'posts': posts})
+
+
 # Страница с информацией о группе
+@page_condition(group_state)
+@cache_feed(lambda request, slug: [f'group:{slug}'])
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.order_by('-pub_date')
+    posts = group.posts.feed()
     page_obj = paginator_func(request, posts)
     context = {
         'group': group,
@@ -32,9 +57,13 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+@page_condition(profile_state)
+@cache_feed(lambda request, username: [f'author:{username}'])
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username
+    )
+    posts = author.posts.feed()
     page_obj = paginator_func(request, posts)
     if request.user.username != username and request.user.is_authenticated:
         following = Follow.objects.filter(
@@ -50,11 +79,13 @@ def profile(request, username):
     return render(request, 'posts/profile.html', context)
 
 
+@page_condition(post_detail_state)
 def post_detail(request, post_id):
     post = get_object_or_404(
-        Post, id=post_id
+        Post.objects.detail(), id=post_id
     )
-    comments = post.comments.all()
+    comments = comments_page(request, post)
+    thumbnails.prefetch([post])
     form = CommentForm(
         request.POST or None,
     )
@@ -66,6 +97,49 @@ def post_detail(request, post_id):
     return render(request, 'posts/post_detail.html', context)
 
 
+def post_search(request):
+    query = request.GET.get('q', '').strip()
+    group = request.GET.get('group', '')
+    author = request.GET.get('author', '').strip()
+    posts, next_cursor = [], None
+    if query:
+        posts, next_cursor = search.search_posts(
+            query,
+            group=group,
+            author=author,
+            cursor=request.GET.get('cursor'),
+            limit=NUMBER_OF_RECORDS,
+        )
+        thumbnails.prefetch(posts)
+    next_query = None
+    if next_cursor:
+        params = request.GET.copy()
+        params['cursor'] = next_cursor
+        next_query = params.urlencode()
+    context = {
+        'query': query,
+        'group': group,
+        'author': author,
+        'groups': Group.objects.all(),
+        'posts': posts,
+        'next_query': next_query,
+    }
+    return render(request, 'posts/search.html', context)
+
+
+def post_comments(request, post_id):
+    post = get_object_or_404(Post, pk=post_id)
+    context = {
+        'post': post,
+        'comments': comments_page(request, post),
+    }
+    if request.is_ajax():
+        return render(
+            request, 'posts/includes/comment_list.html', context
+        )
+    return render(request, 'posts/comments.html', context)
+
+
 @login_required
 def post_create(request):
     user = request.user
@@ -77,7 +151,8 @@ def post_create(request):
     if form.is_valid():
         post = form.save(commit=False)
         post.author = user
-        post.save()
+        with serialized_write():
+            post.save()
         return redirect('posts:profile', user.username)
     return render(request, 'posts/post_create.html', {'form': form})
 
@@ -91,11 +166,12 @@ def post_edit(request, post_id):
         instance=post,
     )
 
-    if post.author != request.user:
+    if post.author_id != request.user.id:
         return redirect('posts:post_detail', post_id)
 
     if form.is_valid():
-        form.save()
+        with serialized_write():
+            form.save()
         return redirect('posts:post_detail', post_id)
 
     context = {
@@ -105,16 +181,32 @@ def post_edit(request, post_id):
     return render(request, 'posts/post_create.html', context)
 
 
-def paginator_func(request, posts):
-    paginator = Paginator(posts, NUMBER_OF_RECORDS)
+def paginator_func(request, posts, paginator_class=CursorPaginator,
+                   **kwargs):
+    paginator = paginator_class(posts, NUMBER_OF_RECORDS, **kwargs)
 
-    page_number = request.GET.get('page')
+    cursor = request.GET.get('cursor')
+    if cursor:
+        page_obj = paginator.get_cursor_page(cursor)
+    else:
+        page_number = request.GET.get('page')
+        page_obj = paginator.get_page(page_number)
 
-    page_obj = paginator.get_page(page_number)
+    thumbnails.prefetch(page_obj)
 
     return page_obj
 
 
+def comments_page(request, post):
+    paginator = CommentPaginator(
+        post.comments.select_related('author'), NUMBER_OF_COMMENTS
+    )
+    cursor = request.GET.get('cursor')
+    if cursor:
+        return paginator.get_cursor_page(cursor)
+    return paginator.get_page(1)
+
+
 @login_required
 def add_comment(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
@@ -123,14 +215,40 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        comment.save()
+        with serialized_write():
+            comment.save()
     return redirect('posts:post_detail', post_id=post_id)
 
 
+def follow_feed_scopes(request):
+    """Ленты страницы подписок: сама лента и посты каждого автора.
+
+    Новый или изменённый пост сдвигает поколение своего автора, и
+    страницы всех его подписчиков устаревают без перебора подписчиков.
+    """
+    author_ids = request.user.follower.values_list('author_id', flat=True)
+    return [
+        f'timeline:{request.user.pk}',
+        *(f'author-posts:{pk}' for pk in author_ids),
+    ]
+
+
 @login_required
+@cache_feed(follow_feed_scopes)
 def follow_index(request):
-    posts = Post.objects.filter(author__following__user=request.user)
-    page_obj = paginator_func(request, posts)
+    if settings.FOLLOW_FEED_ENGINE == 'merge':
+        author_ids = request.user.follower.values_list(
+            'author_id', flat=True
+        )
+        page_obj = paginator_func(
+            request,
+            Post.objects.feed(),
+            MergeFeedPaginator,
+            author_ids=author_ids,
+        )
+    else:
+        posts = timeline.timeline_posts(request.user)
+        page_obj = paginator_func(request, posts, TimelinePaginator)
     context = {
         'page_obj': page_obj,
     }
@@ -139,25 +257,14 @@ def follow_index(request):
 
 @login_required
 def profile_follow(request, username):
-    follow = Follow.objects.filter(
-        user=request.user,
-        author=User.objects.get(username=username),
-    ).exists()
-    if request.user.username == username or follow:
-        return redirect('posts:profile', username=username)
-    author = User.objects.get(username=username)
-    Follow.objects.create(
-        user=request.user,
-        author=author,
-    )
+    author = get_object_or_404(User, username=username)
+    follows.follow(request.user, author)
     return redirect('posts:profile', username=username)
 
 
 @login_required
 def profile_unfollow(request, username):
-    author = User.objects.get(username=username)
-    Follow.objects.filter(
-        user=request.user,
-        author=author
-    ).delete()
+    follows.unfollow_many(
+        request.user, User.objects.filter(username=username)
+    )
     return redirect('posts:profile', username=username)
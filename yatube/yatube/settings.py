@@ -42,6 +42,7 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'api.apps.ApiConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -49,10 +50,11 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'sorl.thumbnail',
-    'debug_toolbar',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.PerformanceMiddleware',
+    'core.middleware.QueryInspectorMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -60,9 +62,20 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
 
+# Поиск N+1 и медленных запросов: сколько одинаковых по форме запросов
+# за один HTTP-запрос считается N+1 и с какой длительности в мс запрос
+# считается медленным. Находки пишутся в лог core.queries
+QUERY_INSPECTOR_ENABLED = DEBUG
+QUERY_REPEAT_THRESHOLD = 5
+SLOW_QUERY_MS = 100
+
+# debug_toolbar нужен только при разработке
+if DEBUG:
+    INSTALLED_APPS.append('debug_toolbar')
+    MIDDLEWARE.append('debug_toolbar.middleware.DebugToolbarMiddleware')
+
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
@@ -90,10 +103,33 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# Профиль настройки SQLite: 'default' — настройки SQLite по умолчанию,
+# 'production' — WAL и PRAGMA для конкурентной нагрузки
+SQLITE_PROFILE = os.environ.get('SQLITE_PROFILE', 'default')
+
+SQLITE_PROFILES = {
+    'default': {},
+    'production': {
+        'journal_mode': 'wal',
+        'synchronous': 'normal',
+        'busy_timeout': 5000,
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -20000,
+        'temp_store': 'memory',
+    },
+}
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'core.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 0)),
+        'OPTIONS': {
+            'timeout': 20,
+        },
+        'TRANSACTION_MODE': (
+            'IMMEDIATE' if SQLITE_PROFILE == 'production' else None
+        ),
     }
 }
 
@@ -141,6 +177,25 @@ STATIC_URL = '/static/'
 
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 
+STATIC_ROOT = os.environ.get(
+    'STATIC_ROOT', os.path.join(BASE_DIR, 'staticfiles')
+)
+
+# Раздача статики и медиа самим WSGI-приложением (core.files.FileServer),
+# без отдельного файлового сервера. collectstatic с этой переменной
+# окружения добавляет хеш содержимого в имена и сжатые копии .gz и .br
+# (.br — пакетом brotli из requirements.txt; без него только .gz)
+SERVE_FILES = os.environ.get('SERVE_FILES') == '1'
+
+if SERVE_FILES:
+    STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+
+# Сколько секунд клиенты кешируют файлы: статику с хешем в имени —
+# навсегда, прочую статику и медиа — недолго
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+STATIC_MAX_AGE = 60 * 60
+MEDIA_MAX_AGE = 24 * 60 * 60
+
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:main'
 # LOGOUT_REDIRECT_URL = 'posts:index'
@@ -150,7 +205,26 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
+# Кеш общий для всех процессов (core.cache.SQLiteCache): поколения лент,
+# которые сдвигают сигналы, сразу видны каждому воркеру, и страницы и
+# ETag не расходятся между процессами. Тесты работают с TEST_CACHES,
+# их подставляют core.runner.TestRunner и conftest.py
+CACHE_PATH = os.environ.get(
+    'CACHE_PATH', os.path.join(BASE_DIR, 'cache.sqlite3')
+)
+
 CACHES = {
+    'default': {
+        'BACKEND': 'core.cache.SQLiteCache',
+        'LOCATION': CACHE_PATH,
+        'OPTIONS': {
+            'MAX_ENTRIES': 20000,
+            'MAX_BYTES': 256 * 1024 * 1024,
+        },
+    }
+}
+
+TEST_CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
@@ -159,3 +233,40 @@ CACHES = {
 INTERNAL_IPS = [
     '127.0.0.1',
 ]
+
+# Сколько последних постов хранится в ленте подписок каждого пользователя
+TIMELINE_MAX_ENTRIES = 1000
+
+# Как собирается лента подписок:
+# 'timeline' — из материализованной ленты (fan-out on write),
+# 'merge' — слиянием лент авторов при чтении (fan-out on read)
+FOLLOW_FEED_ENGINE = 'timeline'
+
+# Сколько живёт кеш страниц лент; актуальность обеспечивают поколения
+# лент, которые сдвигаются сигналами при изменении постов и подписок
+FEED_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Сколько после истечения страница ленты ещё может отдаваться, пока её
+# пересобирает другой запрос, и на сколько берётся блокировка пересборки
+FEED_CACHE_STALE_TIMEOUT = 60 * 60
+FEED_CACHE_LOCK_TIMEOUT = 30
+
+# Популярные посты (команда update_trending): комментарий теряет половину
+# веса за TRENDING_HALF_LIFE секунд, в рейтинг попадают посты не старше
+# TRENDING_WINDOW секунд
+TRENDING_HALF_LIFE = 60 * 60 * 24
+TRENDING_WINDOW = 60 * 60 * 24 * 7
+
+# Сколько потоков создают миниатюры картинок постов в фоне, по умолчанию
+# два. При THUMBNAIL_WORKERS=0 в окружении миниатюра создаётся сразу в
+# том же запросе; тесты включают этот режим сами (TEST_RUNNER, conftest.py)
+THUMBNAIL_WORKERS = int(os.environ.get('THUMBNAIL_WORKERS', 2))
+
+TEST_RUNNER = 'core.runner.TestRunner'
+
+# Ограничения для картинок постов: размер файла, число пикселей до
+# декодирования, длина большей стороны и качество после пересохранения
+POST_IMAGE_MAX_BYTES = 20 * 1024 * 1024
+POST_IMAGE_MAX_PIXELS = 50_000_000
+POST_IMAGE_MAX_SIDE = 2048
+POST_IMAGE_QUALITY = 85